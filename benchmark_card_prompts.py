@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+卡牌提示词生成性能测试
+
+比较三种方式生成 N 条提示词（默认 100 万）的单卡耗时：
+  - legacy:   每张卡重新拼接整个标签列表再 join（旧版 generate_card_prompt 的做法）
+  - per-card: 逐张调用 generate_card_prompt
+  - compiled: iter_character_cards，使用预编译前缀和 NumPy 批量解码组合
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from generate_card_prompts import (
+    BASE_FEATURES, CARD_SPECIFIC_TAGS, DEFAULT_PACK, QUALITY_TAGS,
+    generate_card_prompt, iter_card_combinations, iter_character_cards,
+)
+
+CARDS_PER_CHARACTER = 20000
+TRAITS = {"hair_color": "pink hair", "eye_color": "purple eyes"}
+
+
+def legacy_prompt(card_type, pose, clothing, background, expression, traits):
+    """旧版实现：每张卡都重建完整列表"""
+    base_features = [traits["hair_color"], traits["eye_color"]] + BASE_FEATURES
+    prompt_parts = (
+        QUALITY_TAGS +
+        base_features +
+        [pose] +
+        CARD_SPECIFIC_TAGS[card_type] +
+        [clothing] +
+        [background] +
+        [expression]
+    )
+    return ", ".join(prompt_parts)
+
+
+def character_batches(n):
+    """把 n 张 SR 卡拆成若干角色，每个角色不超过 CARDS_PER_CHARACTER 张"""
+    for i in range(0, n, CARDS_PER_CHARACTER):
+        yield i // CARDS_PER_CHARACTER, min(CARDS_PER_CHARACTER, n - i)
+
+
+def bench_legacy(n, fn):
+    for character, count in character_batches(n):
+        rng = np.random.default_rng(character)
+        for pose, clothing, background, expression in iter_card_combinations("SR", count, rng):
+            fn("SR", pose, clothing, background, expression, TRAITS)
+
+
+def bench_compiled(n):
+    for character, count in character_batches(n):
+        for _ in iter_character_cards(TRAITS, {"SR": count}, seed=character):
+            pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="卡牌提示词生成性能测试")
+    parser.add_argument("-n", type=int, default=1_000_000, help="提示词数量 (默认: 1000000)")
+    args = parser.parse_args()
+
+    print(f"生成 {args.n} 条 SR 卡提示词 (每个角色 {CARDS_PER_CHARACTER} 张, "
+          f"组合空间 {len(DEFAULT_PACK.clothing)}×{len(DEFAULT_PACK.backgrounds)}×"
+          f"{len(DEFAULT_PACK.expressions)}×{len(DEFAULT_PACK.poses['SR'])})")
+    results = []
+    for name, run in (
+        ("legacy", lambda: bench_legacy(args.n, legacy_prompt)),
+        ("per-card", lambda: bench_legacy(args.n, generate_card_prompt)),
+        ("compiled", lambda: bench_compiled(args.n)),
+    ):
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        results.append((name, elapsed))
+        print(f"{name:10s} {elapsed:8.2f} s  {elapsed / args.n * 1e9:8.0f} ns/卡")
+
+    legacy = results[0][1]
+    for name, elapsed in results[1:]:
+        print(f"{name} 相对 legacy 提速 {legacy / elapsed:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+main.py 启动耗时测试
+
+用 `python -X importtime -c "import main"` 统计导入 main 的累计耗时，列出最慢的直接依赖，
+并和 STARTUP_BUDGET_MS 比较；超出预算时退出码为 1，可以放进 CI 防止重新引入顶层重量级导入。
+另外测量 `python main.py --help` 的总耗时（含解释器启动），作为短任务的实际体验参考。
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# import main 的累计导入耗时预算（毫秒）。bilibili_api/aiohttp/numpy 都改为在函数内导入后约 50 ms，
+# 主要是 asyncio；留出余量给较慢的 CI 机器
+STARTUP_BUDGET_MS = 150
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def parse_importtime(stderr):
+    """解析 -X importtime 的输出，返回 [(模块名, 嵌套深度, 自身微秒, 累计微秒), ...]（按输出顺序）"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        self_us, cumulative_us, raw_name = int(parts[0]), int(parts[1]), parts[2]
+        name = raw_name.strip()
+        depth = (len(raw_name) - len(raw_name.lstrip()) - 1) // 2
+        rows.append((name, depth, self_us, cumulative_us))
+    return rows
+
+
+def measure_import(module):
+    """在子进程中导入 module，返回 (module 的累计导入微秒, 其直接依赖 [(模块名, 累计微秒), ...])"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=ROOT, capture_output=True, text=True, check=True)
+    rows = parse_importtime(result.stderr)
+    # importtime 先输出子模块再输出父模块，module 那一行之前、上一个顶层模块之后的都是它的依赖
+    end = max(i for i, row in enumerate(rows) if row[0] == module and row[1] == 0)
+    start = end
+    while start > 0 and rows[start - 1][1] > 0:
+        start -= 1
+    children = [(name, cumulative) for name, depth, _, cumulative in rows[start:end] if depth == 1]
+    return rows[end][3], children
+
+
+def measure_wall(args, runs):
+    """子进程总耗时的中位数（秒）"""
+    durations = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable] + args, cwd=ROOT, capture_output=True, check=True)
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="main.py 启动耗时测试")
+    parser.add_argument("--runs", type=int, default=5, help="重复次数，取中位数 (默认: 5)")
+    parser.add_argument("--top", type=int, default=10, help="列出最慢的直接依赖数量 (默认: 10)")
+    parser.add_argument("--budget", type=float, default=STARTUP_BUDGET_MS,
+                        help=f"导入耗时预算，毫秒 (默认: {STARTUP_BUDGET_MS})")
+    args = parser.parse_args()
+
+    totals = []
+    children = []
+    for _ in range(args.runs):
+        total, children = measure_import("main")
+        totals.append(total)
+    import_ms = statistics.median(totals) / 1000
+
+    print(f"import main 累计导入耗时: {import_ms:8.1f} ms (中位数，{args.runs} 次)")
+    print("最慢的直接依赖:")
+    for name, cumulative in sorted(children, key=lambda c: -c[1])[:args.top]:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+    baseline = measure_wall(["-c", "pass"], args.runs)
+    help_time = measure_wall(["main.py", "--help"], args.runs)
+    print(f"python -c pass          {baseline * 1000:8.1f} ms")
+    print(f"python main.py --help   {help_time * 1000:8.1f} ms  (+{(help_time - baseline) * 1000:.1f} ms)")
+
+    if import_ms > args.budget:
+        print(f"❌ 超出预算 {args.budget:.0f} ms")
+        return 1
+    print(f"✅ 在预算 {args.budget:.0f} ms 以内")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,8 +4,21 @@
 生成SDXL格式的英文词组提示词
 """
 
+import argparse
+import csv
+import hashlib
+import json
+import os
 import random
-from typing import List, Dict
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Iterator, Optional, Set, Tuple
+
+import numpy as np
+
+from prompt_dedup import NearDuplicateIndex, tokenize
 
 # 基础人设特征（固定）
 BASE_TRAITS = {
@@ -37,7 +50,6 @@ SR_CARD_POSES = [
     "dynamic movement, perspective view, action composition",
     "action stance, low angle, dynamic perspective",
     "dynamic pose, dramatic angle, cinematic perspective",
-    "action pose, perspective shot, dynamic framing",
     "dynamic stance, three-quarter view, action perspective"
 ]
 
@@ -125,6 +137,148 @@ QUALITY_TAGS = [
 ]
 
 
+# 所有卡牌共用的基础标签（接在角色特征之后）
+BASE_FEATURES = [
+    "character card",
+    "game character",
+    "anime style",
+    "illustration"
+]
+
+# 根据卡牌类型添加的特定元素（避免与pose重复）
+CARD_SPECIFIC_TAGS = {
+    "R": [
+        "simple composition"
+    ],
+    "SR": [
+        "action scene"
+    ],
+    "SSR": [
+        "alluring pose",
+        "sensual",
+        "elegant",
+        "captivating"
+    ]
+}
+
+# 稀有度权重：按总数分配各类卡牌数量时使用 (5:15:5)
+RARITY_WEIGHTS = {
+    "R": 5,
+    "SR": 15,
+    "SSR": 5
+}
+
+CARD_TYPES = ("R", "SR", "SSR")
+
+
+class VocabPack:
+    """
+    提示词词表包
+
+    默认使用本模块中的常量，也可以从外部 JSON/YAML 文件加载（缺少的字段沿用默认值）。
+    文件字段：poses ({"R": [...], "SR": [...], "SSR": [...]})、clothing、backgrounds、
+    expressions、quality_tags、base_features、card_specific（同 poses 结构）、
+    rarity_weights ({"R": 5, ...})。
+    """
+
+    def __init__(self, poses: Dict[str, List[str]], clothing: List[str], backgrounds: List[str],
+                 expressions: List[str], quality_tags: List[str], base_features: List[str],
+                 card_specific: Dict[str, List[str]], rarity_weights: Dict[str, float]):
+        # 去掉词表中的重复项（保持原顺序），否则组合不重复也不能保证提示词不重复
+        self.poses = {t: list(dict.fromkeys(poses[t])) for t in CARD_TYPES}
+        self.clothing = list(dict.fromkeys(clothing))
+        self.backgrounds = list(dict.fromkeys(backgrounds))
+        self.expressions = list(dict.fromkeys(expressions))
+        self.quality_tags = list(quality_tags)
+        self.base_features = list(base_features)
+        self.card_specific = {t: list(card_specific.get(t, [])) for t in CARD_TYPES}
+        self.rarity_weights = {t: float(rarity_weights.get(t, 0)) for t in CARD_TYPES}
+        for name in ("clothing", "backgrounds", "expressions"):
+            if not getattr(self, name):
+                raise ValueError(f"词表 {name} 不能为空")
+        for card_type in CARD_TYPES:
+            if not self.poses[card_type]:
+                raise ValueError(f"词表 poses.{card_type} 不能为空")
+
+    @classmethod
+    def default(cls) -> "VocabPack":
+        """由模块常量构成的默认词表"""
+        return cls(
+            poses={"R": R_CARD_POSES, "SR": SR_CARD_POSES, "SSR": SSR_CARD_POSES},
+            clothing=CLOTHING_STYLES,
+            backgrounds=BACKGROUND_STYLES,
+            expressions=EXPRESSIONS,
+            quality_tags=QUALITY_TAGS,
+            base_features=BASE_FEATURES,
+            card_specific=CARD_SPECIFIC_TAGS,
+            rarity_weights=RARITY_WEIGHTS,
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "VocabPack":
+        """从 JSON 或 YAML 文件加载词表（YAML 需要安装 PyYAML）"""
+        with open(path, "r", encoding="utf-8") as f:
+            if path.lower().endswith((".yaml", ".yml")):
+                try:
+                    import yaml
+                except ImportError:
+                    raise ImportError("加载 YAML 词表需要安装 PyYAML: pip install pyyaml")
+                data = yaml.safe_load(f) or {}
+            else:
+                data = json.load(f)
+        merged = DEFAULT_PACK.to_dict()
+        for key, value in data.items():
+            if key not in merged:
+                raise ValueError(f"未知的词表字段: {key}")
+            if isinstance(merged[key], dict):
+                merged[key] = dict(merged[key], **value)
+            else:
+                merged[key] = value
+        return cls(**merged)
+
+    def to_dict(self) -> Dict:
+        return {
+            "poses": self.poses,
+            "clothing": self.clothing,
+            "backgrounds": self.backgrounds,
+            "expressions": self.expressions,
+            "quality_tags": self.quality_tags,
+            "base_features": self.base_features,
+            "card_specific": self.card_specific,
+            "rarity_weights": self.rarity_weights,
+        }
+
+    def counts_for(self, total: int) -> Dict[str, int]:
+        """按稀有度权重把总卡牌数分配到各类型（最大余数法，总和恰好等于 total）"""
+        weight_sum = sum(self.rarity_weights.values())
+        if weight_sum <= 0:
+            raise ValueError("稀有度权重之和必须大于 0")
+        exact = {t: total * self.rarity_weights[t] / weight_sum for t in CARD_TYPES}
+        counts = {t: int(exact[t]) for t in CARD_TYPES}
+        remainder = total - sum(counts.values())
+        for t in sorted(CARD_TYPES, key=lambda t: exact[t] - counts[t], reverse=True)[:remainder]:
+            counts[t] += 1
+        return counts
+
+    def compile(self, card_type: str, traits: Dict[str, str]) -> List[str]:
+        """
+        把某类卡牌的固定部分预先拼接成字符串
+
+        返回每个姿势对应的前缀（质量标签、角色特征、基础标签、姿势、类型标签），
+        生成每张卡牌时只需再拼上服装、背景和表情。
+        """
+        head = self.quality_tags + [traits["hair_color"], traits["eye_color"]] + self.base_features
+        return [", ".join(head + [pose] + self.card_specific[card_type]) for pose in self.poses[card_type]]
+
+
+DEFAULT_PACK = VocabPack.default()
+
+
+def render_card_prompt(prefix: str, clothing: str, background: str, expression: str) -> str:
+    """用预编译前缀拼出完整提示词"""
+    return f"{prefix}, {clothing}, {background}, {expression}"
+
+
 def generate_card_prompt(card_type: str, pose: str, clothing: str, background: str, 
                         expression: str, traits: Dict[str, str]) -> str:
     """
@@ -141,52 +295,173 @@ def generate_card_prompt(card_type: str, pose: str, clothing: str, background: s
     Returns:
         SDXL格式的英文词组提示词
     """
-    # 基础特征（固定）
-    base_features = [
-        traits["hair_color"],
-        traits["eye_color"],
-        "character card",
-        "game character",
-        "anime style",
-        "illustration"
-    ]
-    
-    # 根据卡牌类型添加特定元素（避免与pose重复）
-    if card_type == "R":
-        card_specific = [
-            "simple composition"
-        ]
-    elif card_type == "SR":
-        card_specific = [
-            "action scene"
-        ]
-    else:  # SSR
-        card_specific = [
-            "alluring pose",
-            "sensual",
-            "elegant",
-            "captivating"
-        ]
+    head = DEFAULT_PACK.quality_tags + [traits["hair_color"], traits["eye_color"]] + DEFAULT_PACK.base_features
+    prefix = ", ".join(head + [pose] + DEFAULT_PACK.card_specific[card_type])
+    return render_card_prompt(prefix, clothing, background, expression)
     
-    # 组合所有元素
-    prompt_parts = (
-        QUALITY_TAGS +
-        base_features +
-        [pose] +
-        card_specific +
-        [clothing] +
-        [background] +
-        [expression]
-    )
-    
-    # 转换为词组格式（逗号分隔）
-    prompt = ", ".join(prompt_parts)
-    
-    return prompt
+
+# 组合下标的轴顺序：服装变化最快，保证前20张卡牌服装和背景都不重复
+AXES = ("clothing", "background", "expression", "pose")
+
+# 每批解码的组合数
+DECODE_CHUNK = 4096
+
+
+def combination_sizes(card_type: str, pack: Optional[VocabPack] = None) -> Tuple[int, int, int, int]:
+    """返回某类卡牌 (服装, 背景, 表情, 姿势) 各轴的取值个数"""
+    pack = pack or DEFAULT_PACK
+    return (len(pack.clothing), len(pack.backgrounds), len(pack.expressions), len(pack.poses[card_type]))
+
+
+def combination_space_size(card_type: str, pack: Optional[VocabPack] = None) -> int:
+    """某类卡牌可生成的不重复组合总数"""
+    return int(np.prod(combination_sizes(card_type, pack), dtype=np.int64))
+
+
+def decode_combinations(indices: np.ndarray, sizes: Tuple[int, ...]) -> np.ndarray:
+    """
+    把组合序号批量映射为各轴下标（向量化）
+
+    先按混合进制拆出各位数字 q0..q3，再令第 k 轴取 (q0 + ... + qk) mod size_k。
+    这是 [0, 总数) 到各轴组合的一一映射，所以不同序号一定得到不同组合；
+    同时相邻序号的所有轴都会一起变化，前 min(size) 张卡牌在每个轴上都不重复。
+
+    Args:
+        indices: 组合序号数组
+        sizes: 各轴取值个数
+
+    Returns:
+        形状为 (len(indices), len(sizes)) 的下标数组
+    """
+    indices = np.asarray(indices, dtype=np.int64)
+    result = np.empty((len(indices), len(sizes)), dtype=np.int64)
+    remainder = indices
+    running = np.zeros_like(indices)
+    for axis, size in enumerate(sizes):
+        running = running + remainder % size
+        remainder = remainder // size
+        result[:, axis] = running % size
+    return result
+
+
+def iter_combination_indices(card_type: str, count: int, rng: np.random.Generator,
+                             offset: int = 0, pack: Optional[VocabPack] = None) -> Iterator[np.ndarray]:
+    """
+    惰性生成某类卡牌的组合下标，每批为形状 (n, 4) 的数组，列为 (服装, 背景, 表情, 姿势)
+
+    各轴先用 NumPy 随机打乱，再按序号 offset .. offset+count-1 逐批解码，
+    内存占用与卡牌数量无关。
+
+    Args:
+        card_type: 卡牌类型 (R/SR/SSR)
+        count: 卡牌数量
+        rng: NumPy 随机数生成器
+        offset: 起始序号（同一角色不同卡牌类型错开，避免服装背景重复）
+        pack: 词表，默认为 DEFAULT_PACK
+
+    Raises:
+        ValueError: 数量超过可用组合总数
+    """
+    sizes = combination_sizes(card_type, pack)
+    total = combination_space_size(card_type, pack)
+    if count > total:
+        raise ValueError(
+            f"{card_type}卡数量 {count} 超过可用组合数 {total} "
+            f"(服装 {sizes[0]} × 背景 {sizes[1]} × 表情 {sizes[2]} × 姿势 {sizes[3]})"
+        )
+
+    # 姿势保持原顺序，其余各轴随机打乱
+    perms = [rng.permutation(sizes[0]), rng.permutation(sizes[1]), rng.permutation(sizes[2]), np.arange(sizes[3])]
+    for start in range(0, count, DECODE_CHUNK):
+        stop = min(start + DECODE_CHUNK, count)
+        combos = decode_combinations((np.arange(start, stop) + offset) % total, sizes)
+        for axis, perm in enumerate(perms):
+            combos[:, axis] = perm[combos[:, axis]]
+        yield combos
+
+
+def iter_card_combinations(card_type: str, count: int, rng: np.random.Generator,
+                           offset: int = 0, pack: Optional[VocabPack] = None) -> Iterator[Tuple[str, str, str, str]]:
+    """
+    惰性生成某类卡牌的 (姿势, 服装, 背景, 表情) 组合，保证互不重复
+
+    参数同 iter_combination_indices。
+    """
+    pack = pack or DEFAULT_PACK
+    poses = pack.poses[card_type]
+    for combos in iter_combination_indices(card_type, count, rng, offset, pack):
+        for c, b, e, p in combos.tolist():
+            yield poses[p], pack.clothing[c], pack.backgrounds[b], pack.expressions[e]
+
+
+def fixed_prompt_tokens(traits: Dict[str, str], pack: Optional[VocabPack] = None) -> Set[str]:
+    """同一角色所有卡牌共有的词（质量标签、基础标签、角色特征），近似去重时忽略"""
+    pack = pack or DEFAULT_PACK
+    return tokenize(" ".join(pack.quality_tags + pack.base_features + [traits["hair_color"], traits["eye_color"]]))
+
+
+def iter_character_cards(traits: Dict[str, str], counts: Dict[str, int],
+                         seed: Optional[int] = None,
+                         pack: Optional[VocabPack] = None,
+                         dedup: Optional[str] = None,
+                         dedup_threshold: float = 0.85) -> Iterator[Tuple[str, int, str]]:
+    """
+    惰性生成单个角色的所有卡牌提示词
+
+    Args:
+        traits: 角色特征
+        counts: 各类卡牌数量，如 {"R": 5, "SR": 15, "SSR": 5}
+        seed: 随机种子；为 None 时从 random 模块取种子，以便 random.seed() 控制可重现性
+        pack: 词表，默认为 DEFAULT_PACK
+        dedup: 近似去重方式：None 不检查；"report" 照常输出并在 stderr 报告近似重复；
+            "replace" 跳过近似重复项，从组合空间中继续取后续组合补足数量
+        dedup_threshold: 近似重复的 Jaccard 相似度阈值（忽略角色共有的词）
+
+    Yields:
+        (卡牌类型, 该类型内序号(从1开始), 提示词)
+    """
+    pack = pack or DEFAULT_PACK
+    if seed is None:
+        seed = random.getrandbits(64)
+    if dedup not in (None, "report", "replace"):
+        raise ValueError(f"未知的去重方式: {dedup}")
+    index = NearDuplicateIndex(dedup_threshold, ignore=fixed_prompt_tokens(traits, pack)) if dedup else None
+
+    # 各类型使用同一种子（即同一套打乱顺序），并依次错开起始序号，
+    # 使整副卡牌的服装和背景尽量不重复
+    offset = 0
+    for card_type in CARD_TYPES:
+        count = counts.get(card_type, 0)
+        prefixes = pack.compile(card_type, traits)
+        clothing, backgrounds, expressions = pack.clothing, pack.backgrounds, pack.expressions
+        # 替换模式下可能需要超出 count 的组合，因此惰性地遍历整个组合空间
+        budget = combination_space_size(card_type, pack) if dedup == "replace" and count else count
+        i = 0
+        for combos in iter_combination_indices(card_type, budget, np.random.default_rng(seed), offset, pack):
+            for c, b, e, p in combos.tolist():
+                if i == count:
+                    break
+                prompt = f"{prefixes[p]}, {clothing[c]}, {backgrounds[b]}, {expressions[e]}"
+                if index is not None:
+                    added, matches = index.add_if_new(prompt)
+                    if not added:
+                        print(f"{card_type}卡 #{i + 1} 与已生成的卡牌近似 (相似度 {matches[0][1]:.2f})",
+                              file=sys.stderr)
+                        if dedup == "replace":
+                            continue
+                i += 1
+                yield card_type, i, prompt
+            if i == count:
+                break
+        if i < count:
+            print(f"⚠️  {card_type}卡只找到 {i} 张互不近似的组合（需要 {count} 张）", file=sys.stderr)
+        offset += count
 
 
 def generate_character_cards(character_name: str, traits: Dict[str, str], 
-                             r_count: int = 5, sr_count: int = 15, ssr_count: int = 5) -> Dict[str, List[str]]:
+                             r_count: int = 5, sr_count: int = 15, ssr_count: int = 5,
+                             seed: Optional[int] = None,
+                             pack: Optional[VocabPack] = None) -> Dict[str, List[str]]:
     """
     为单个角色生成所有卡牌的提示词
     
@@ -196,98 +471,161 @@ def generate_character_cards(character_name: str, traits: Dict[str, str],
         r_count: R卡数量
         sr_count: SR卡数量
         ssr_count: SSR卡数量
+        seed: 随机种子（可选）
+        pack: 词表（可选，默认为 DEFAULT_PACK）
     
     Returns:
         包含所有卡牌提示词的字典
+
+    Raises:
+        ValueError: 某类卡牌数量超过可用组合总数
     """
     cards = {
         "R": [],
         "SR": [],
         "SSR": []
     }
-    
-    # 确保所有卡牌使用不同的服装和背景组合
-    total_cards = r_count + sr_count + ssr_count
-    used_clothing = set()
-    used_background = set()
-    
-    # 打乱列表以确保随机性
-    clothing_list = CLOTHING_STYLES.copy()
-    background_list = BACKGROUND_STYLES.copy()
-    random.shuffle(clothing_list)
-    random.shuffle(background_list)
-    
-    clothing_idx = 0
-    background_idx = 0
-    
-    # 生成R卡
-    for i in range(r_count):
-        # 确保服装和背景不重复
-        while clothing_list[clothing_idx % len(clothing_list)] in used_clothing:
-            clothing_idx += 1
-        while background_list[background_idx % len(background_list)] in used_background:
-            background_idx += 1
-        
-        clothing = clothing_list[clothing_idx % len(clothing_list)]
-        background = background_list[background_idx % len(background_list)]
-        expression = random.choice(EXPRESSIONS)
-        pose = R_CARD_POSES[i % len(R_CARD_POSES)]
-        
-        used_clothing.add(clothing)
-        used_background.add(background)
-        clothing_idx += 1
-        background_idx += 1
-        
-        prompt = generate_card_prompt("R", pose, clothing, background, expression, traits)
-        cards["R"].append(prompt)
-    
-    # 生成SR卡
-    for i in range(sr_count):
-        # 确保服装和背景不重复
-        while clothing_list[clothing_idx % len(clothing_list)] in used_clothing:
-            clothing_idx += 1
-        while background_list[background_idx % len(background_list)] in used_background:
-            background_idx += 1
-        
-        clothing = clothing_list[clothing_idx % len(clothing_list)]
-        background = background_list[background_idx % len(background_list)]
-        expression = random.choice(EXPRESSIONS)
-        pose = SR_CARD_POSES[i % len(SR_CARD_POSES)]
-        
-        used_clothing.add(clothing)
-        used_background.add(background)
-        clothing_idx += 1
-        background_idx += 1
-        
-        prompt = generate_card_prompt("SR", pose, clothing, background, expression, traits)
-        cards["SR"].append(prompt)
-    
-    # 生成SSR卡
-    for i in range(ssr_count):
-        # 确保服装和背景不重复
-        while clothing_list[clothing_idx % len(clothing_list)] in used_clothing:
-            clothing_idx += 1
-        while background_list[background_idx % len(background_list)] in used_background:
-            background_idx += 1
-        
-        clothing = clothing_list[clothing_idx % len(clothing_list)]
-        background = background_list[background_idx % len(background_list)]
-        expression = random.choice(EXPRESSIONS)
-        pose = SSR_CARD_POSES[i % len(SSR_CARD_POSES)]
-        
-        used_clothing.add(clothing)
-        used_background.add(background)
-        clothing_idx += 1
-        background_idx += 1
-        
-        prompt = generate_card_prompt("SSR", pose, clothing, background, expression, traits)
-        cards["SSR"].append(prompt)
+    counts = {"R": r_count, "SR": sr_count, "SSR": ssr_count}
+    for card_type, _, prompt in iter_character_cards(traits, counts, seed, pack):
+        cards[card_type].append(prompt)
     
     return cards
 
 
-def main():
-    """主函数：生成第一个角色的卡牌提示词"""
+DEFAULT_COUNTS = {"R": 5, "SR": 15, "SSR": 5}
+
+
+def load_roster(path: str) -> List[Dict[str, str]]:
+    """
+    读取角色名单（CSV 或 JSON）
+
+    每个角色至少包含 name、hair_color、eye_color 字段，可选 r_count、sr_count、
+    ssr_count（覆盖默认数量）和 seed（覆盖按名字派生的种子）。
+    JSON 文件为角色对象数组。
+    """
+    if path.lower().endswith(".json"):
+        with open(path, "r", encoding="utf-8") as f:
+            roster = json.load(f)
+    else:
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            roster = list(csv.DictReader(f))
+
+    for i, character in enumerate(roster, 1):
+        missing = [k for k in ("name", "hair_color", "eye_color") if not character.get(k)]
+        if missing:
+            raise ValueError(f"角色名单第 {i} 项缺少字段: {', '.join(missing)}")
+    # 不同的名字可能清洗成同一个文件名（"A B" 与 "A_B"，或在不区分大小写的文件系统上 "Alice" 与 "alice"），
+    # 会互相覆盖输出文件，断点续跑时也会被一起跳过
+    seen = {}
+    for character in roster:
+        name = character["name"]
+        key = character_slug(name).casefold()
+        if key in seen:
+            if seen[key] == name:
+                raise ValueError(f"角色名单中存在重复的 name: {name}")
+            raise ValueError(f"角色 {seen[key]!r} 和 {name!r} 的输出文件名相同，请修改其中一个名字")
+        seen[key] = name
+    return roster
+
+
+def character_seed(name: str, base_seed: int = 0) -> int:
+    """按角色名派生确定性种子，同一名单重复生成结果一致，与处理顺序和进程无关"""
+    digest = hashlib.sha256(f"{base_seed}:{name}".encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "little")
+
+
+def character_slug(name: str) -> str:
+    """角色名转换成文件名（只保留安全字符）"""
+    return re.sub(r"[^\w.-]+", "_", name, flags=re.UNICODE).strip("_") or "character"
+
+
+def character_output_path(output_dir: str, name: str, fmt: str) -> str:
+    """角色输出文件路径"""
+    return os.path.join(output_dir, f"{character_slug(name)}.{fmt}")
+
+
+def write_character_deck(character: Dict[str, str], output_dir: str, fmt: str = "jsonl",
+                         counts: Optional[Dict[str, int]] = None, base_seed: int = 0,
+                         pack: Optional[VocabPack] = None, dedup: Optional[str] = None) -> Tuple[str, int]:
+    """
+    生成单个角色的整副卡牌并流式写入文件（在进程池中运行）
+
+    先写入 .tmp 临时文件，完成后再改名，因此已存在的输出文件一定是完整的，
+    可据此断点续跑。
+
+    Returns:
+        (角色名, 写入的卡牌数量)
+    """
+    name = character["name"]
+    traits = {"hair_color": character["hair_color"], "eye_color": character["eye_color"]}
+    counts = dict(counts or DEFAULT_COUNTS)
+    for card_type in CARD_TYPES:
+        value = character.get(f"{card_type.lower()}_count")
+        if value not in (None, ""):
+            counts[card_type] = int(value)
+    seed = character.get("seed")
+    seed = int(seed) if seed not in (None, "") else character_seed(name, base_seed)
+
+    path = character_output_path(output_dir, name, fmt)
+    tmp_path = path + ".tmp"
+    written = 0
+    with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+        writer = None
+        if fmt == "csv":
+            writer = csv.writer(f)
+            writer.writerow(["character", "card_type", "index", "prompt"])
+        for card_type, index, prompt in iter_character_cards(traits, counts, seed, pack, dedup):
+            if writer is not None:
+                writer.writerow([name, card_type, index, prompt])
+            else:
+                f.write(json.dumps({"character": name, "card_type": card_type,
+                                    "index": index, "prompt": prompt}, ensure_ascii=False) + "\n")
+            written += 1
+    os.replace(tmp_path, path)
+    return name, written
+
+
+def generate_roster(roster: List[Dict[str, str]], output_dir: str, fmt: str = "jsonl",
+                    counts: Optional[Dict[str, int]] = None, base_seed: int = 0,
+                    workers: Optional[int] = None, resume: bool = True,
+                    pack: Optional[VocabPack] = None, dedup: Optional[str] = None) -> int:
+    """
+    用进程池为名单中的所有角色生成卡牌，每个角色一个输出文件
+
+    Args:
+        roster: 角色名单
+        output_dir: 输出目录
+        fmt: 输出格式 (jsonl/csv)
+        counts: 默认各类卡牌数量
+        base_seed: 全局种子，与角色名一起派生每个角色的种子
+        workers: 进程数，默认为 CPU 核数
+        resume: 跳过已有完整输出文件的角色
+        pack: 词表（可选，默认为 DEFAULT_PACK）
+        dedup: 近似去重方式 (None/"report"/"replace")，见 iter_character_cards
+
+    Returns:
+        本次生成的卡牌总数
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    pending = roster
+    if resume:
+        pending = [c for c in roster if not os.path.exists(character_output_path(output_dir, c["name"], fmt))]
+        skipped = len(roster) - len(pending)
+        if skipped:
+            print(f"跳过 {skipped} 个已完成的角色", file=sys.stderr)
+
+    total = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(write_character_deck, c, output_dir, fmt, counts, base_seed, pack, dedup) for c in pending]
+        for done, future in enumerate(futures, 1):
+            name, written = future.result()
+            total += written
+            print(f"[{done}/{len(pending)}] {name}: {written} 张", file=sys.stderr)
+    return total
+
+
+def print_first_character():
+    """生成并打印第一个角色的卡牌提示词"""
     # 设置随机种子以确保可重现性（可选）
     random.seed(42)
     
@@ -333,6 +671,48 @@ def main():
     print("=" * 80)
 
 
+def main():
+    """主函数：不带参数时生成第一个角色的卡牌提示词；指定 --roster 时批量生成整个名单"""
+    parser = argparse.ArgumentParser(description="游戏角色卡牌AI提示词生成器")
+    parser.add_argument("--roster", help="角色名单文件 (CSV 或 JSON)")
+    parser.add_argument("--output-dir", "-o", default="card_prompts", help="输出目录 (默认: card_prompts)")
+    parser.add_argument("--format", choices=["jsonl", "csv"], default="jsonl", help="输出格式 (默认: jsonl)")
+    parser.add_argument("--r-count", type=int, default=DEFAULT_COUNTS["R"], help="每个角色的R卡数量")
+    parser.add_argument("--sr-count", type=int, default=DEFAULT_COUNTS["SR"], help="每个角色的SR卡数量")
+    parser.add_argument("--ssr-count", type=int, default=DEFAULT_COUNTS["SSR"], help="每个角色的SSR卡数量")
+    parser.add_argument("--seed", type=int, default=0, help="全局随机种子 (默认: 0)")
+    parser.add_argument("--workers", type=int, help="进程数 (默认: CPU 核数)")
+    parser.add_argument("--no-resume", action="store_true", help="重新生成已完成的角色")
+    parser.add_argument("--vocab", help="词表文件 (JSON 或 YAML)，缺少的字段沿用内置词表")
+    parser.add_argument("--total", type=int, help="每个角色的卡牌总数，按词表中的稀有度权重分配到各类型")
+    parser.add_argument("--dump-vocab", metavar="PATH", help="把当前词表导出为 JSON 文件后退出")
+    parser.add_argument("--dedup", choices=["report", "replace"],
+                        help="近似去重：report 只报告，replace 用其他组合替换近似重复的卡牌")
+    args = parser.parse_args()
+
+    pack = VocabPack.load(args.vocab) if args.vocab else DEFAULT_PACK
+    if args.dump_vocab:
+        with open(args.dump_vocab, "w", encoding="utf-8") as f:
+            json.dump(pack.to_dict(), f, ensure_ascii=False, indent=2)
+        print(f"词表已导出到 {args.dump_vocab}", file=sys.stderr)
+        return
+
+    if not args.roster:
+        print_first_character()
+        return
+
+    roster = load_roster(args.roster)
+    if args.total is not None:
+        counts = pack.counts_for(args.total)
+    else:
+        counts = {"R": args.r_count, "SR": args.sr_count, "SSR": args.ssr_count}
+    start_time = time.time()
+    total = generate_roster(roster, args.output_dir, args.format, counts, args.seed,
+                            args.workers, resume=not args.no_resume, pack=pack, dedup=args.dedup)
+    print(f"生成完成：{len(roster)} 个角色，本次写入 {total} 张卡牌，用时 {time.time() - start_time:.2f}s",
+          file=sys.stderr)
+
+
 if __name__ == "__main__":
     main()
 
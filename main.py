@@ -1,10 +1,18 @@
 import asyncio
-import aiohttp
+import argparse
+import signal
+import re
+import struct
+import sys
+import unicodedata
+from array import array
+from bisect import bisect_left, bisect_right
 import time
 import os
 import json
 import datetime
-from bilibili_api import user
+# bilibili_api / aiohttp / numpy 导入很慢 (合计约 0.6 秒)，只在用到的函数里导入，
+# 让 import main 和 --help 这类短任务不必付出这部分启动开销 (见 benchmark_startup.py)
 
 # ================= 配置区域 =================
 TARGET_UIDS = [
@@ -38,11 +46,167 @@ TARGET_UIDS = [
 KEYWORDS = ["ComfyUI", "Stable Diffusion", "Flux", "Sora", "Runway", "Luma", "AIGC", "LoRA", "工作流", "模型"]
 HISTORY_DAYS = 14 # 记忆保留时间稍微拉长一点，防止周报重复
 CONCURRENCY_LIMIT = 2  # 降低并发数，避免触发风控
+# 数据源：配置了登录凭据 (BILI_SESSDATA 等) 时默认读取关注动态流，几次分页请求覆盖全部已关注的UP主；
+# 设为 "uid" 则强制逐个UP主请求
+SOURCE_MODE = os.environ.get("BILI_SOURCE", "feed")
+FEED_MAX_PAGES = 20  # 动态流最多翻页数，防止时间窗口过长时无限翻页
+SESSION_FILE = "session.json"  # 反爬会话状态缓存，与 history.bin 一起提交
+WBI_KEY_TTL = 12 * 3600  # WBI 签名密钥每天轮换，缓存半天
+BUVID_TTL = 30 * 24 * 3600  # 激活过的 buvid 可长期复用
+SCHEDULE_FILE = "schedule.json"  # 每个UP主的投稿频率与上次请求时间
+MAX_STALENESS = 3 * 24 * 3600  # 任何UP主最多隔 3 天必须请求一次
+POLL_FRACTION = 0.5  # 请求间隔取平均投稿间隔的一半，保证每个投稿周期至少检查两次
+INTERVAL_ALPHA = 0.3  # 投稿间隔指数加权平均的系数，越大越看重最近的间隔
+HEALTH_FILE = "health.json"  # 各UP主的连续失败记录（熔断器）
+FAIL_THRESHOLD = 3  # 连续失败几次后熔断
+COOLDOWN_BASE = 24 * 3600  # 熔断后首次冷却 1 天（日报模式即跳过一次运行），之后每次探测失败翻倍
+COOLDOWN_MAX = 30 * 24 * 3600
+RISK_BACKOFF = 30 * 60  # 触发风控后全局暂停逐个请求的时间，连续触发时翻倍
+RISK_BACKOFF_MAX = 6 * 3600
+PERMANENT_ERROR_CODES = {-400, -404, -626}  # 参数错误/不存在/用户不存在，重试无意义，直接熔断
+RISK_ERROR_CODES = {-352, -412}
+FINGERPRINT_FILE = "fingerprints.json"  # 已推送视频的标题+简介，用于识别跨UP主的转载/重剪
+DUPLICATE_THRESHOLD = 0.6  # 字符 3-gram 集合的 Jaccard 相似度达到该值视为同一视频
+SHINGLE_SIZE = 3
+TITLE_WEIGHT = 4  # 标题片段的权重（简介片段为 1）
+DESC_CHARS = 200  # 只取简介开头，避免长简介里的通用话术稀释相似度
+STATS_CONCURRENCY = 2  # 获取播放数据的并发数
+REPLY_WEIGHT = 20  # 计算热度时一条评论折合多少次播放
+TOP_N = 20  # 周报按热度只列前 N 条
+# 常驻模式 (python main.py --daemon)
+REPORT_TIME = "09:00"  # 每个工作日发送日报/周报的北京时间
+CHECKPOINT_INTERVAL = 10 * 60  # 内存中的记录每 10 分钟写盘一次
 # ===========================================
 
 class HistoryManager:
-    """记忆管理 (保持不变)"""
-    def __init__(self, file_path="history.json"):
+    """
+    记忆管理：已推送视频的 av 号集合
+
+    bvid 解码成 av 号 (整数)，按记录时间顺序存成两个并列的 array：aids (uint64) 和 times (uint32)，
+    另有一份排好序的 aids 副本用于二分查找判断是否已处理。每条记录 20 字节，约为 JSON 字典的五分之一；
+    过期清理只需在 times 上二分后切片。
+    磁盘格式为 "文件头 + 三个数组的原始字节"，加载时一次读取即可，无需解析。
+    旧的 history.json 会在首次加载时自动迁移。
+    """
+    MAGIC = b"BHST"
+    VERSION = 1
+    HEADER = struct.Struct("<4sII")  # magic, version, 记录数
+
+    def __init__(self, file_path="history.bin", legacy_path="history.json"):
+        self.file_path = file_path
+        self.legacy_path = legacy_path
+        self.aids = array('Q')    # 按记录时间排列
+        self.times = array('I')   # 与 aids 一一对应，单调不减
+        self.index = array('Q')   # aids 排序后的副本
+        self._load()
+
+    def _load(self):
+        if os.path.exists(self.file_path):
+            try:
+                self._load_binary()
+                return
+            except (OSError, ValueError) as e:
+                print(f"⚠️  {self.file_path} 读取失败，将重新创建: {e}")
+                self.aids, self.times, self.index = array('Q'), array('I'), array('Q')
+        if os.path.exists(self.legacy_path):
+            self._load_legacy()
+
+    def _load_binary(self):
+        with open(self.file_path, 'rb') as f:
+            raw = f.read()
+        magic, version, count = self.HEADER.unpack_from(raw)
+        if magic != self.MAGIC or version != self.VERSION:
+            raise ValueError("文件格式不匹配")
+        view = memoryview(raw)[self.HEADER.size:]
+        sizes = (count * 8, count * 4, count * 8)
+        if len(view) != sum(sizes):
+            raise ValueError("文件长度与记录数不符")
+        self.aids.frombytes(view[:sizes[0]])
+        self.times.frombytes(view[sizes[0]:sizes[0] + sizes[1]])
+        self.index.frombytes(view[sizes[0] + sizes[1]:])
+        if sys.byteorder == 'big':  # 文件统一使用小端序
+            for a in (self.aids, self.times, self.index):
+                a.byteswap()
+
+    def _load_legacy(self):
+        from bilibili_api.utils.aid_bvid_transformer import bvid2aid
+        try:
+            with open(self.legacy_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except:
+            return
+        for bvid, ts in sorted(data.items(), key=lambda item: item[1]):
+            try:
+                aid = bvid2aid(bvid)
+            except ValueError:
+                continue
+            self.aids.append(aid)
+            self.times.append(int(ts))
+        self.index = array('Q', sorted(self.aids))
+        print(f"已从 {self.legacy_path} 迁移 {len(self.aids)} 条记录")
+
+    @staticmethod
+    def _aid(bvid):
+        from bilibili_api.utils.aid_bvid_transformer import bvid2aid
+        return bvid2aid(bvid)
+
+    def _contains(self, aid):
+        i = bisect_left(self.index, aid)
+        return i < len(self.index) and self.index[i] == aid
+
+    def is_processed(self, bvid):
+        return self._contains(self._aid(bvid))
+
+    def add(self, bvid):
+        aid = self._aid(bvid)
+        if self._contains(aid):
+            return
+        self.aids.append(aid)
+        self.times.append(int(time.time()))
+        self.index.insert(bisect_left(self.index, aid), aid)
+
+    def save_and_clean(self):
+        now = time.time()
+        expire_time = now - (HISTORY_DAYS * 24 * 3600)
+        # times 单调不减，过期记录都在开头
+        cut = bisect_right(self.times, int(expire_time))
+        if cut:
+            del self.aids[:cut]
+            del self.times[:cut]
+            self.index = array('Q', sorted(self.aids))
+        arrays = [self.aids, self.times, self.index]
+        if sys.byteorder == 'big':
+            arrays = [array(a.typecode, a) for a in arrays]
+            for a in arrays:
+                a.byteswap()
+        tmp_path = self.file_path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(self.HEADER.pack(self.MAGIC, self.VERSION, len(self.aids)))
+            for a in arrays:
+                f.write(a.tobytes())
+        os.replace(tmp_path, self.file_path)
+        # 已迁移到二进制格式，删除旧文件
+        if os.path.exists(self.legacy_path):
+            os.remove(self.legacy_path)
+        print(f"记忆库更新：清理后剩余 {len(self.aids)} 条记录")
+
+class SessionCache:
+    """
+    反爬会话状态缓存
+
+    bilibili_api 在进程内缓存 buvid3/buvid4、bili_ticket 和 WBI 签名密钥，每次冷启动都要重新激活、
+    重新获取，而冷启动的匿名会话正是最容易触发 -352 的情况。这里把这些状态连同过期时间存到文件里，
+    启动时写回 bilibili_api，只有过期的项才会在首次请求时重新获取。不保存任何登录凭据。
+    """
+    # 字段名: (bilibili_api.utils.network 中的全局变量名, 有效期)；bili_ticket 自带过期时间
+    FIELDS = {
+        "buvid3": ("__buvid3", BUVID_TTL),
+        "buvid4": ("__buvid4", BUVID_TTL),
+        "wbi_mixin_key": ("__wbi_mixin_key", WBI_KEY_TTL),
+        "bili_ticket": ("__bili_ticket", None),
+    }
+
+    def __init__(self, file_path=SESSION_FILE):
         self.file_path = file_path
         self.data = self._load()
 
@@ -55,21 +219,337 @@ class HistoryManager:
         except:
             return {}
 
-    def is_processed(self, bvid):
-        return bvid in self.data
+    def restore(self):
+        """把未过期的状态写回 bilibili_api，返回恢复的字段名"""
+        from bilibili_api.utils import network as bili_network
+        now = time.time()
+        restored = []
+        for name, (attr, _) in self.FIELDS.items():
+            entry = self.data.get(name)
+            if not entry or not entry.get("value") or entry.get("expires", 0) <= now:
+                continue
+            setattr(bili_network, attr, entry["value"])
+            restored.append(name)
+        if "bili_ticket" in restored:
+            setattr(bili_network, "__bili_ticket_expires", str(int(self.data["bili_ticket"]["expires"])))
+        return restored
 
-    def add(self, bvid):
-        self.data[bvid] = int(time.time())
+    def save(self):
+        """记录 bilibili_api 当前的状态，值没变的项保留原来的过期时间"""
+        from bilibili_api.utils import network as bili_network
+        now = int(time.time())
+        for name, (attr, ttl) in self.FIELDS.items():
+            value = getattr(bili_network, attr, "")
+            if not value:
+                continue
+            entry = self.data.get(name) or {}
+            if entry.get("value") == value and entry.get("expires", 0) > now:
+                continue
+            if ttl is None:
+                expires = int(getattr(bili_network, "__bili_ticket_expires", 0) or 0)
+            else:
+                expires = now + ttl
+            self.data[name] = {"value": value, "expires": expires}
+        with open(self.file_path, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, indent=2)
 
-    def save_and_clean(self):
-        now = time.time()
-        expire_time = now - (HISTORY_DAYS * 24 * 3600)
-        new_data = {k: v for k, v in self.data.items() if v > expire_time}
+class PollScheduler:
+    """
+    按投稿活跃度安排请求
+
+    记录每个UP主投稿间隔的指数加权平均，请求间隔取其 POLL_FRACTION 倍且不超过 MAX_STALENESS：
+    天天更新的UP主每次运行都请求，几周一更的UP主隔几天才请求一次。
+    被跳过的UP主下次请求时，时间窗口会向前延伸到上次请求的时间，因此不会漏掉中间发布的视频。
+    """
+    RUN_SLACK = 3600  # 定时任务启动时间有抖动，提前 1 小时也算到期
+
+    def __init__(self, file_path=SCHEDULE_FILE):
+        self.file_path = file_path
+        self.data = self._load()
+
+    def _load(self):
+        if not os.path.exists(self.file_path):
+            return {}
+        try:
+            with open(self.file_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except:
+            return {}
+
+    def poll_interval(self, uid):
+        entry = self.data.get(str(uid))
+        if not entry or not entry.get("interval"):
+            return 0
+        return min(entry["interval"] * POLL_FRACTION, MAX_STALENESS)
+
+    def is_due(self, uid, now):
+        entry = self.data.get(str(uid))
+        if not entry or not entry.get("last_poll"):
+            return True
+        return now - entry["last_poll"] + self.RUN_SLACK >= self.poll_interval(uid)
+
+    def time_config(self, uid, time_config):
+        """UP主自上次请求以来的时间窗口（不短于今天的报告窗口）"""
+        entry = self.data.get(str(uid))
+        if not entry or not entry.get("last_poll"):
+            return time_config
+        window = max(time_config['window'], time_config['now'] - entry["last_poll"] + self.RUN_SLACK)
+        return dict(time_config, window=window)
+
+    def record(self, uid, post_times, now):
+        """记录一次成功的请求，用新出现的投稿时间更新平均投稿间隔"""
+        entry = self.data.setdefault(str(uid), {})
+        last_post = entry.get("last_post")
+        interval = entry.get("interval")
+        for t in sorted(post_times):
+            if last_post is not None and t > last_post:
+                gap = t - last_post
+                interval = gap if interval is None else INTERVAL_ALPHA * gap + (1 - INTERVAL_ALPHA) * interval
+            if last_post is None or t > last_post:
+                last_post = t
+        entry["last_poll"] = int(now)
+        if last_post is not None:
+            entry["last_post"] = int(last_post)
+        if interval is not None:
+            entry["interval"] = int(interval)
+
+    def save(self):
+        with open(self.file_path, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, indent=2)
+
+class RiskControlError(Exception):
+    """请求触发B站风控 (-352/-412)，与具体UP主无关"""
+
+def is_risk_control_error(e):
+    code = getattr(e, 'code', None)
+    return code in RISK_ERROR_CODES or '-352' in str(e) or '风控' in str(e)
+
+class CircuitBreaker:
+    """
+    跨运行的UP主熔断器
+
+    - 连续失败 FAIL_THRESHOLD 次（或一次永久性错误，如账号不存在）后熔断，冷却期内直接跳过，
+      不再占用并发名额和重试等待时间
+    - 冷却期满后放行一次探测（半开）：成功则恢复，失败则冷却时间翻倍
+    - 风控错误不计入UP主的失败次数，而是全局退避：本轮剩余的请求立即放弃，冷却期内不再逐个请求
+    """
+
+    def __init__(self, file_path=HEALTH_FILE):
+        self.file_path = file_path
+        self.data = self._load()
+        self.data.setdefault("uids", {})
+        self.data.setdefault("risk", {"trips": 0, "until": 0})
+
+    def _load(self):
+        if not os.path.exists(self.file_path):
+            return {}
+        try:
+            with open(self.file_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except:
+            return {}
+
+    def allow(self, uid, now):
+        """UP主当前是否可以请求（未熔断，或冷却期满可以探测）"""
+        entry = self.data["uids"].get(str(uid))
+        return entry is None or entry.get("open_until", 0) <= now
+
+    def global_open(self, now=None):
+        """是否处于风控全局退避期"""
+        return (now or time.time()) < self.data["risk"]["until"]
+
+    def record_success(self, uid):
+        self.data["uids"].pop(str(uid), None)
+
+    def record_failure(self, uid, error, now):
+        entry = self.data["uids"].setdefault(str(uid), {"failures": 0})
+        entry["failures"] += 1
+        if getattr(error, 'code', None) in PERMANENT_ERROR_CODES:
+            entry["failures"] = max(entry["failures"], FAIL_THRESHOLD)
+        entry["last_error"] = str(error)[:200]
+        if entry["failures"] >= FAIL_THRESHOLD:
+            cooldown = min(COOLDOWN_BASE * 2 ** (entry["failures"] - FAIL_THRESHOLD), COOLDOWN_MAX)
+            entry["open_until"] = int(now + cooldown)
+            print(f"🔌 UID {uid} 连续失败 {entry['failures']} 次，"
+                  f"熔断至 {time.strftime('%m-%d %H:%M', time.localtime(entry['open_until']))}")
+
+    def record_risk(self, now):
+        """触发风控：开始（或延长）全局退避，同一次退避期内只计一次"""
+        risk = self.data["risk"]
+        if now < risk["until"]:
+            return
+        risk["trips"] += 1
+        risk["until"] = int(now + min(RISK_BACKOFF * 2 ** (risk["trips"] - 1), RISK_BACKOFF_MAX))
+        print(f"⚠️  触发风控，暂停逐个请求至 {time.strftime('%m-%d %H:%M', time.localtime(risk['until']))}")
+
+    def record_run_ok(self):
+        """本轮有请求成功且没有触发风控，重置全局退避计数"""
+        if not self.global_open():
+            self.data["risk"]["trips"] = 0
+
+    def save(self):
+        with open(self.file_path, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, indent=2, ensure_ascii=False)
+
+def _normalize(text):
+    return re.sub(r"[\W_]+", "", unicodedata.normalize("NFKC", text).lower())
+
+def _shingles(text):
+    """字符 3-gram 集合（中文没有空格分词，用字符片段代替单词）"""
+    if len(text) <= SHINGLE_SIZE:
+        return {text} if text else set()
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+def video_shingles(title, desc=""):
+    """
+    标题+简介的加权片段集合
+
+    简介只取与标题等长的开头（不超过 DESC_CHARS），标题片段复制 TITLE_WEIGHT 份（加序号前缀区分），
+    简介片段加 "d" 前缀，因此简介最多占五分之一，通用的简介话术不会盖过标题。
+    """
+    title = _normalize(title)
+    desc = _normalize(desc[:DESC_CHARS])[:len(title)]
+    tokens = {f"{i}{t}" for t in _shingles(title) for i in range(TITLE_WEIGHT)}
+    tokens.update(f"d{t}" for t in _shingles(desc))
+    return tokens
+
+def same_uploader(a, b):
+    """两条记录是否来自同一UP主（优先比较 mid，旧记录没有 mid 时比较昵称）"""
+    if a.get('mid') and b.get('mid'):
+        return a['mid'] == b['mid']
+    return a.get('author') == b.get('author')
+
+class DuplicateCollapser:
+    """
+    合并跨UP主的近似重复视频
+
+    同一教程被多个UP主搬运、或换个标题重新剪辑的视频，标题+简介的字符片段高度重合。
+    用 MinHash LSH 索引 (prompt_dedup.NearDuplicateIndex) 查找近似项，耗时与视频数近似线性：
+    - 与本轮更早发布的、其他UP主的视频近似：并入该视频，报告中只列一行并注明相似投稿
+    - 与历史窗口内已推送的、其他UP主的视频近似：直接跳过
+    同一UP主的系列视频（第3集/第4集）标题和简介模板相近，不视为重复。
+    索引内容保存在 FINGERPRINT_FILE 中，保留 HISTORY_DAYS 天；常驻模式下每次 save() 时同步清理内存中的索引。
+    """
+
+    def __init__(self, file_path=FINGERPRINT_FILE, threshold=DUPLICATE_THRESHOLD):
+        self.file_path = file_path
+        self.threshold = threshold
+        self._rebuild(self._load())
+
+    def _load(self):
+        if not os.path.exists(self.file_path):
+            return []
+        try:
+            with open(self.file_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except:
+            return []
+
+    def _rebuild(self, entries):
+        from prompt_dedup import NearDuplicateIndex
+        self.index = NearDuplicateIndex(self.threshold)
+        self.entries = []  # 与索引编号一一对应
+        for entry in entries:
+            self.index.add(video_shingles(entry['title'], entry.get('desc', '')))
+            self.entries.append(entry)
+
+    def collapse(self, videos):
+        """返回去重后的视频列表；被合并的视频记在代表视频的 'duplicates' 字段中"""
+        kept = []
+        heads = {}  # 索引编号 -> 本轮报告中代表该簇的视频
+        for v in sorted(videos, key=lambda x: x['created']):
+            desc = v.get('description', '')
+            tokens = video_shingles(v['title'], desc)
+            signature = self.index.signature(tokens)
+            entry = {'bvid': v['bvid'], 'title': v['title'], 'desc': desc[:DESC_CHARS],
+                     'author': v['author'], 'mid': v.get('mid', 0), 'time': int(time.time())}
+            matches = [m for m, _ in self.index.query(tokens, signature)
+                       if not same_uploader(self.entries[m], entry)]
+            item = self.index.add(tokens, signature)
+            self.entries.append(entry)
+            if not matches:
+                heads[item] = v
+                kept.append(v)
+                continue
+            head = heads.get(matches[0])
+            if head is not None:
+                head.setdefault('duplicates', []).append(v)
+                heads[item] = head
+            else:
+                original = self.entries[matches[0]]
+                print(f"跳过近似重复：{v['title']} ≈ 已推送的 {original['author']}: {original['title']}")
+        if len(kept) < len(videos):
+            print(f"近似去重：{len(videos)} 条合并为 {len(kept)} 条")
+        return kept
+
+    def save(self):
+        expire_time = time.time() - HISTORY_DAYS * 24 * 3600
+        entries = [e for e in self.entries if e['time'] > expire_time]
+        if len(entries) < len(self.entries):
+            # 索引不支持删除，常驻模式下按剩余记录重建，过期的视频不再拦截新投稿
+            self._rebuild(entries)
         with open(self.file_path, 'w', encoding='utf-8') as f:
-            json.dump(new_data, f, indent=2)
-        print(f"记忆库更新：清理后剩余 {len(new_data)} 条记录")
+            json.dump(entries, f, ensure_ascii=False, indent=1)
+
+async def fetch_stat(bvid, semaphore, credential=None):
+    """获取单个视频的统计数据 (view/reply/like/...)，失败返回 None"""
+    from bilibili_api import video
+    async with semaphore:
+        try:
+            info = await video.Video(bvid=bvid, credential=credential).get_info()
+            return info.get('stat')
+        except Exception as e:
+            print(f"⚠️  {bvid} 播放数据获取失败: {e}")
+            return None
+
+async def enrich_stats(videos, credential=None):
+    """只为命中的视频并发获取播放数据，写入 v['stat']"""
+    semaphore = asyncio.Semaphore(STATS_CONCURRENCY)
+    results = await asyncio.gather(*(fetch_stat(v['bvid'], semaphore, credential) for v in videos))
+    for v, stat in zip(videos, results):
+        if stat:
+            v['stat'] = stat
+
+def rank_by_velocity(videos, now):
+    """
+    按热度从高到低排序，热度写入 v['velocity']
 
-memory = HistoryManager()
+    热度 = (播放 + 评论 × REPLY_WEIGHT) / 发布以来的小时数。报告里的视频都是本轮第一次出现，
+    没有更早的播放数据可比，所以用发布以来的平均增速。
+    """
+    import numpy as np
+    if not videos:
+        return videos
+    views = np.array([v.get('stat', {}).get('view', 0) for v in videos], dtype=float)
+    replies = np.array([v.get('stat', {}).get('reply', 0) for v in videos], dtype=float)
+    created = np.array([v['created'] for v in videos], dtype=float)
+    hours = np.maximum((now - created) / 3600, 1.0)  # 不足 1 小时按 1 小时算，避免刚发布的视频被放大
+    velocity = (views + REPLY_WEIGHT * replies) / hours
+    order = np.argsort(-velocity, kind="stable")
+    for i in order:
+        videos[i]['velocity'] = float(velocity[i])
+    return [videos[i] for i in order]
+
+class MonitorState:
+    """一次运行（或整个常驻进程）用到的全部持久化状态，在 main() / daemon() 中加载"""
+
+    def __init__(self):
+        self.memory = HistoryManager()
+        self.session = SessionCache()
+        self.scheduler = PollScheduler()
+        self.breaker = CircuitBreaker()
+        self.collapser = DuplicateCollapser()
+        # 恢复上次运行的 buvid / WBI 密钥，省去冷启动的预热请求
+        restored = self.session.restore()
+        if restored:
+            print(f"已恢复会话缓存: {', '.join(restored)}")
+
+    def save(self):
+        self.memory.save_and_clean()
+        self.session.save()
+        self.scheduler.save()
+        self.breaker.save()
+        self.collapser.save()
 
 def get_time_config():
     """【新功能】根据今天是星期几，决定抓取策略"""
@@ -85,7 +565,8 @@ def get_time_config():
         return {
             "title": "B站 AIGC 周报 (Past 7 Days)",
             "window": 7 * 24 * 3600,
-            "now": current_timestamp
+            "now": current_timestamp,
+            "rank": True  # 周报按热度排序，只列前 TOP_N 条
         }
     else: # 周二到周五
         print("今天是工作日，执行【日报】模式，抓取过去 1 天...")
@@ -95,12 +576,108 @@ def get_time_config():
             "now": current_timestamp
         }
 
-async def fetch_videos_from_up(uid, semaphore, retry_count=3):
-    """获取UP主视频，带重试机制"""
+def load_credential():
+    """从环境变量读取B站登录凭据，未配置 SESSDATA 时返回 None"""
+    sessdata = os.environ.get("BILI_SESSDATA")
+    if not sessdata:
+        return None
+    from bilibili_api import Credential
+    return Credential(
+        sessdata=sessdata,
+        bili_jct=os.environ.get("BILI_JCT"),
+        buvid3=os.environ.get("BILI_BUVID3"),
+        dedeuserid=os.environ.get("BILI_DEDEUSERID"),
+    )
+
+def feed_item_to_video(item):
+    """把动态流中的视频动态转换成与 get_videos 的 vlist 相同字段的字典"""
+    modules = item.get('modules', {})
+    author = modules.get('module_author', {})
+    major = (modules.get('module_dynamic') or {}).get('major') or {}
+    archive = major.get('archive')
+    if not archive or not archive.get('bvid'):
+        return None
+    return {
+        'bvid': archive['bvid'],
+        'aid': int(archive.get('aid') or 0),
+        'title': archive.get('title', ''),
+        'description': archive.get('desc', ''),
+        'created': int(author.get('pub_ts') or 0),
+        'author': author.get('name', ''),
+        'mid': int(author.get('mid') or 0),
+    }
+
+async def fetch_followed_uids(credential):
+    """获取当前账号关注的全部UID（每页 100 个）"""
+    from bilibili_api import user
+    me = user.User(uid=int(credential.dedeuserid), credential=credential)
+    followed = set()
+    pn = 1
+    while True:
+        page = await me.get_followings(pn=pn, ps=100)
+        entries = page.get('list') or []
+        followed.update(int(e['mid']) for e in entries)
+        if len(entries) < 100:
+            return followed
+        pn += 1
+
+async def fetch_following_feed(credential, time_config):
+    """
+    读取登录账号的关注视频动态流，翻页直到超出时间窗口
+
+    返回 (视频列表, 已被动态流覆盖的UID集合)。覆盖集合包含账号关注的全部UID，
+    这些UP主即使在窗口内没有投稿也无需再单独请求。翻到 FEED_MAX_PAGES 页仍未到达窗口起点时，
+    窗口内更早的视频没有读到，返回空的覆盖集合，由调用方逐个请求。
+    """
+    from bilibili_api import dynamic
+    since = time_config['now'] - time_config['window']
+    videos = []
+    offset = None
+    pages = 0
+    complete = False
+    for pages in range(1, FEED_MAX_PAGES + 1):
+        page = await dynamic.get_dynamic_page_info(credential, _type=dynamic.DynamicType.VIDEO, offset=offset)
+        items = page.get('items') or []
+        oldest = None
+        for item in items:
+            v = feed_item_to_video(item)
+            if v is None:
+                continue
+            oldest = v['created'] if oldest is None else min(oldest, v['created'])
+            videos.append(v)
+        offset = page.get('offset')
+        if not page.get('has_more') or not offset or (oldest is not None and oldest < since):
+            complete = True
+            break
+        await asyncio.sleep(1)  # 翻页间隔，避免触发风控
+
+    print(f"动态流：{pages} 页请求，获取 {len(videos)} 条视频动态")
+    if not complete:
+        print(f"⚠️  动态流翻到 {FEED_MAX_PAGES} 页仍未覆盖整个时间窗口，全部UP主改为逐个请求")
+        return videos, set()
+    covered = {v['mid'] for v in videos}
+    if credential.dedeuserid:
+        try:
+            covered |= await fetch_followed_uids(credential)
+        except Exception as e:
+            print(f"⚠️  获取关注列表失败，仅以动态流中出现的UP主为准: {e}")
+    return videos, covered
+
+async def fetch_videos_from_up(uid, semaphore, retry_count=3, credential=None, breaker=None):
+    """
+    获取UP主视频，带重试机制
+
+    重试后仍触发风控时立即在熔断器中开始全局退避并抛出 RiskControlError；
+    其他错误原样抛出，由调用方记录到熔断器。
+    """
+    from bilibili_api import user
     async with semaphore:
         for attempt in range(retry_count):
+            # 其他UP主已经触发风控，不再继续请求
+            if breaker is not None and breaker.global_open():
+                raise RiskControlError("全局风控退避中，跳过请求")
             try:
-                u = user.User(uid=uid)
+                u = user.User(uid=uid, credential=credential)
                 # 周报模式下，5条可能不够，改为获取最近 10 条
                 videos = await u.get_videos(ps=10) 
                 
@@ -117,25 +694,26 @@ async def fetch_videos_from_up(uid, semaphore, retry_count=3):
                 return videos.get('list', {}).get('vlist', [])
                 
             except Exception as e:
-                error_msg = str(e)
                 # 检查是否是风控错误
-                if '-352' in error_msg or '风控' in error_msg:
+                if is_risk_control_error(e):
                     wait_time = (attempt + 1) * 3
                     if attempt < retry_count - 1:
                         print(f"⚠️  UID {uid} 触发风控，等待 {wait_time} 秒后重试... (尝试 {attempt + 1}/{retry_count})")
                         await asyncio.sleep(wait_time)
                         continue
                     else:
-                        print(f"❌ UID {uid} 获取失败（风控限制）: {error_msg}")
-                        return []
+                        # 立即开始全局退避，还在等待信号量的请求不必再逐个触发风控
+                        if breaker is not None:
+                            breaker.record_risk(time.time())
+                        raise RiskControlError(str(e)) from e
                 else:
-                    # 其他错误，直接返回
-                    print(f"❌ UID {uid} 获取失败: {error_msg}")
-                    return []
+                    # 其他错误，直接抛出
+                    raise
         
         # 所有重试都失败
-        print(f"❌ UID {uid} 获取失败，已重试 {retry_count} 次")
-        return []
+        if breaker is not None:
+            breaker.record_risk(time.time())
+        raise RiskControlError(f"已重试 {retry_count} 次")
 
 async def filter_content(video_data, time_config):
     """【过滤层】增加了严格的时间判断"""
@@ -164,101 +742,63 @@ async def filter_content(video_data, time_config):
     return True
 
 async def send_notification(content, title_prefix):
-    """发送飞书消息（修复版本：检查响应体中的 code 字段）"""
-    webhook_url = os.environ.get("FEISHU_WEBHOOK")
-    if not webhook_url:
-        print("❌ FEISHU_WEBHOOK 未设置")
+    """把报告并发推送到所有已配置的渠道（飞书/钉钉/企业微信/邮件），任一渠道成功即返回 True"""
+    from notifiers import notify_all
+    results = await notify_all(content, title_prefix)
+    if not results:
+        print("❌ 未配置任何推送渠道 (FEISHU_WEBHOOK / DINGTALK_WEBHOOK / WECOM_WEBHOOK / SMTP_HOST)")
         return False
+    return any(results.values())
+
+async def collect_videos(config, credential, state):
+    """抓取并过滤出本次需要推送的新视频，返回 (新视频列表, 成功数, 失败数)"""
+    memory, scheduler, breaker = state.memory, state.scheduler, state.breaker
+    uids = TARGET_UIDS
+    candidates = []  # (视频, 该视频所属UP主的时间窗口)
+    success_count = 0
+    fail_count = 0
     
-    # 格式化内容（text 格式，不使用 Markdown）
-    formatted_content = content \
-        .replace("<h3>", "").replace("</h3>", "\n") \
-        .replace("<ul>", "").replace("</ul>", "") \
-        .replace("<li style='margin-bottom:8px'>", "- ") \
-        .replace("<li>", "- ") \
-        .replace("</li>", "\n") \
-        .replace("<b>", "").replace("</b>", "") \
-        .replace("<a href='", "").replace("'>", ": ") \
-        .replace("</a>", "")
-    
-    # 确保消息包含飞书机器人要求的关键词（安全设置要求）
-    # 飞书机器人关键词：ComfyUI, Stable Diffusion, Flux, Sora, Runway, B站, AIGC, LoRA, 工作流, 模型
-    # 在消息开头明确添加关键词，确保飞书机器人能识别
-    # 注意：使用 text 格式而不是 markdown，因为 markdown 格式中关键词可能无法被识别
-    # 测试发现：text 格式能正确识别关键词，markdown 格式会返回 code=19024
-    text_content = f"B站 AIGC\n\n{title_prefix}\n\n" + formatted_content
-
-    data = {
-        "msg_type": "text", # 使用 text 格式确保关键词能被识别
-        "content": {
-            "text": text_content
-        }
-    }
+    # 优先读取关注动态流，未关注的UP主再逐个请求
+    if credential is not None and SOURCE_MODE != "uid":
+        try:
+            feed_videos, covered = await fetch_following_feed(credential, config)
+            targets = set(TARGET_UIDS)
+            candidates.extend((v, config) for v in feed_videos if v['mid'] in targets)
+            uids = [uid for uid in TARGET_UIDS if uid not in covered]
+            for uid in targets & covered:
+                scheduler.record(uid, [v['created'] for v in feed_videos if v['mid'] == uid], config['now'])
+            success_count += len(TARGET_UIDS) - len(uids)
+            print(f"动态流覆盖 {len(TARGET_UIDS) - len(uids)} 个UP主，剩余 {len(uids)} 个逐个请求\n")
+        except Exception as e:
+            print(f"⚠️  动态流获取失败，改为逐个请求: {e}\n")
     
-    try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                webhook_url,
-                json=data,
-                timeout=aiohttp.ClientTimeout(total=10)
-            ) as resp:
-                # 1. 检查 HTTP 状态码
-                http_status = resp.status
-                
-                # 2. 读取响应体（关键！）
-                try:
-                    response_data = await resp.json()
-                except:
-                    response_text = await resp.text()
-                    print(f"❌ 响应不是有效的JSON (HTTP {http_status}): {response_text}")
-                    return False
-                
-                # 3. 检查飞书 API 的实际状态码
-                # code = 0 表示成功，code != 0 表示失败
-                code = response_data.get("code", -1)
-                msg = response_data.get("msg", "")
-                
-                if code == 0:
-                    print(f"✅ 推送成功 (HTTP {http_status}, code {code})")
-                    return True
-                else:
-                    print(f"❌ 推送失败 (HTTP {http_status}, code={code}): {msg}")
-                    print(f"   响应体: {json.dumps(response_data, ensure_ascii=False)}")
-                    # 如果是关键词错误，打印消息内容的前200个字符用于调试
-                    if code == 19024:
-                        print(f"   消息内容预览: {text_content[:200]}...")
-                        print(f"   ⚠️  提示：飞书机器人要求消息包含特定关键词，请检查机器人安全设置")
-                    return False
-                    
-    except asyncio.TimeoutError:
-        print(f"❌ 推送超时")
-        return False
-    except Exception as e:
-        print(f"❌ 推送异常: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        return False
-
-async def main():
-    # 1. 获取今日策略 (周报 vs 日报)
-    config = get_time_config()
+    # 低活跃的UP主按投稿频率降低请求频率
+    due = [uid for uid in uids if scheduler.is_due(uid, config['now'])]
+    if len(due) < len(uids):
+        print(f"按活跃度跳过 {len(uids) - len(due)} 个近期无需检查的UP主\n")
     
-    print(f"开始监控 {len(TARGET_UIDS)} 个UP主...")
-    print(f"并发限制: {CONCURRENCY_LIMIT}")
-    print("")
+    # 跳过熔断中的UP主；风控退避期内不逐个请求
+    if due and breaker.global_open(config['now']):
+        print(f"⚠️  风控退避中，本轮跳过 {len(due)} 个UP主的逐个请求\n")
+        due = []
+    uids = [uid for uid in due if breaker.allow(uid, config['now'])]
+    if len(uids) < len(due):
+        print(f"熔断中跳过 {len(due) - len(uids)} 个UP主\n")
     
     semaphore = asyncio.Semaphore(CONCURRENCY_LIMIT)
-    tasks = [fetch_videos_from_up(uid, semaphore) for uid in TARGET_UIDS]
+    tasks = [fetch_videos_from_up(uid, semaphore, credential=credential, breaker=breaker) for uid in uids]
     results = await asyncio.gather(*tasks, return_exceptions=True)
     
-    valid_videos = []
-    success_count = 0
-    fail_count = 0
-    
     for i, result in enumerate(results):
+        if isinstance(result, RiskControlError):
+            fail_count += 1
+            print(f"❌ UID {uids[i]} 获取失败（风控限制）: {result}")
+            continue
+        
         if isinstance(result, Exception):
             fail_count += 1
-            print(f"❌ UID {TARGET_UIDS[i]} 获取异常: {result}")
+            print(f"❌ UID {uids[i]} 获取失败: {result}")
+            breaker.record_failure(uids[i], result, time.time())
             continue
         
         if not result:
@@ -266,41 +806,177 @@ async def main():
             continue
         
         success_count += 1
-        for v in result:
-            bvid = v['bvid']
-            
-            # 记忆去重
-            if memory.is_processed(bvid):
-                continue
-            
-            # 传入 config 进行时间判断
-            if await filter_content(v, config):
-                print(f"发现新视频：{v['title']}")
-                valid_videos.append(v)
-                memory.add(bvid)
+        breaker.record_success(uids[i])
+        uid_config = scheduler.time_config(uids[i], config)
+        candidates.extend((v, uid_config) for v in result)
+        scheduler.record(uids[i], [v['created'] for v in result], config['now'])
     
-    print(f"\n监控完成：成功 {success_count} 个，失败 {fail_count} 个")
+    if success_count:
+        breaker.record_run_ok()
+    
+    valid_videos = []
+    for v, video_config in candidates:
+        bvid = v['bvid']
+        
+        # 记忆去重
+        if memory.is_processed(bvid):
+            continue
+        
+        # 传入 config 进行时间判断
+        if await filter_content(v, video_config):
+            print(f"发现新视频：{v['title']}")
+            valid_videos.append(v)
+            memory.add(bvid)
+    
+    return valid_videos, success_count, fail_count
 
-    if valid_videos:
+async def send_report(valid_videos, config):
+    """把新视频整理成列表并推送"""
+    if config.get('rank'):
+        # 周报：按热度排序（视频已由 rank_by_velocity 排好），只列前 TOP_N 条
+        shown = valid_videos[:TOP_N]
+    else:
         # 按发布时间倒序排列 (新的在前)
         valid_videos.sort(key=lambda x: x['created'], reverse=True)
-        
-        msg = "<ul>"
-        for v in valid_videos:
-            # 格式化一下时间，比如 [01-05]
-            time_str = time.strftime("%m-%d", time.localtime(v['created']))
-            msg += f"<li style='margin-bottom:8px'>[{time_str}] <b>{v['author']}</b>: <a href='https://www.bilibili.com/video/{v['bvid']}'>{v['title']}</a></li>"
-        msg += "</ul>"
-        
-        success = await send_notification(msg, config['title'])
-        if success:
-            print(f"推送成功！共 {len(valid_videos)} 条")
-        else:
-            print(f"推送失败！共 {len(valid_videos)} 条（请查看上方错误信息）")
+        shown = valid_videos
+    
+    msg = "<ul>"
+    for v in shown:
+        # 格式化一下时间，比如 [01-05]
+        time_str = time.strftime("%m-%d", time.localtime(v['created']))
+        extra = ""
+        if v.get('duplicates'):
+            authors = "、".join(dict.fromkeys(d['author'] for d in v['duplicates']))
+            extra = f"（另有 {len(v['duplicates'])} 个相似投稿：{authors}）"
+        if config.get('rank') and 'stat' in v:
+            extra = f"（{v['stat'].get('view', 0)} 播放，约 {v['velocity']:.0f}/小时）" + extra
+        msg += f"<li style='margin-bottom:8px'>[{time_str}] <b>{v['author']}</b>: <a href='https://www.bilibili.com/video/{v['bvid']}'>{v['title']}</a>{extra}</li>"
+    msg += "</ul>"
+    if len(shown) < len(valid_videos):
+        msg += f"另有 {len(valid_videos) - len(shown)} 条热度较低的视频未列出"
+    
+    success = await send_notification(msg, config['title'])
+    if success:
+        print(f"推送成功！共 {len(valid_videos)} 条")
+    else:
+        print(f"推送失败！共 {len(valid_videos)} 条（请查看上方错误信息）")
+    return success
+
+async def run_check(config, credential, state):
+    """执行一轮抓取 + 推送"""
+    print(f"开始监控 {len(TARGET_UIDS)} 个UP主...")
+    print(f"并发限制: {CONCURRENCY_LIMIT}")
+    print("")
+    
+    valid_videos, success_count, fail_count = await collect_videos(config, credential, state)
+    print(f"\n监控完成：成功 {success_count} 个，失败 {fail_count} 个")
+    valid_videos = state.collapser.collapse(valid_videos)
+    if valid_videos and config.get('rank'):
+        await enrich_stats(valid_videos, credential)
+        valid_videos = rank_by_velocity(valid_videos, time.time())
+
+    if valid_videos:
+        await send_report(valid_videos, config)
     else:
         print("没有符合条件的新视频。")
 
-    memory.save_and_clean()
+async def main():
+    # 1. 获取今日策略 (周报 vs 日报)
+    config = get_time_config()
+    
+    # 2. 加载记录和会话缓存
+    state = MonitorState()
+    
+    # 3. 抓取、过滤并推送；中途出错也要保存记录，否则下次运行会重复推送
+    try:
+        await run_check(config, load_credential(), state)
+    finally:
+        state.save()
+
+def next_report_time(now, report_time=REPORT_TIME):
+    """下一个工作日 report_time (北京时间) 对应的时间戳"""
+    hour, minute = (int(x) for x in report_time.split(":"))
+    beijing_now = datetime.datetime.utcfromtimestamp(now) + datetime.timedelta(hours=8)
+    target = beijing_now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if target <= beijing_now:
+        target += datetime.timedelta(days=1)
+    while target.weekday() >= 5:  # 周末不发报告，与定时任务保持一致
+        target += datetime.timedelta(days=1)
+    return (target - datetime.timedelta(hours=8) - datetime.datetime(1970, 1, 1)).total_seconds()
+
+async def daemon(poll_minutes=0, report_time=REPORT_TIME):
+    """
+    常驻模式：进程内调度，省去每次运行重新安装依赖、导入模块和读写记录的开销
+
+    - 每个工作日 report_time 按原规则发送日报/周报
+    - poll_minutes > 0 时另外每隔 poll_minutes 分钟检查一次，发现新视频立即推送
+    - 记录保存在内存中，每 CHECKPOINT_INTERVAL 秒及退出时写盘
+    - 收到 SIGINT/SIGTERM 后等当前任务结束、写盘后退出
+    """
+    state = MonitorState()
+    credential = load_credential()
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, RuntimeError):
+            pass  # Windows 不支持，Ctrl+C 仍会中断
+
+    now = time.time()
+    next_report = next_report_time(now, report_time)
+    poll_interval = poll_minutes * 60
+    next_poll = now if poll_interval else float("inf")
+    last_poll = now - 2 * poll_interval
+    next_checkpoint = now + CHECKPOINT_INTERVAL
+    print(f"常驻模式启动，下次报告: {time.strftime('%Y-%m-%d %H:%M', time.localtime(next_report))}"
+          + (f"，每 {poll_minutes} 分钟检查一次新视频" if poll_interval else ""))
+
+    while not stop.is_set():
+        wake = min(next_report, next_poll, next_checkpoint)
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=max(0, wake - time.time()))
+            break
+        except asyncio.TimeoutError:
+            pass
+
+        now = time.time()
+        if now >= next_report:
+            next_report = next_report_time(now, report_time)
+            try:
+                await run_check(get_time_config(), credential, state)
+            except Exception as e:
+                print(f"❌ 报告任务异常: {e}")
+            next_checkpoint = now  # 报告发送后立即写盘
+        if now >= next_poll:
+            next_poll = now + poll_interval
+            # 时间窗口覆盖上次检查以来的时间，多留一个间隔防止漏掉边界
+            config = {"title": "B站 AIGC 新视频", "window": now - last_poll + poll_interval, "now": now}
+            try:
+                await run_check(config, credential, state)
+                last_poll = now
+            except Exception as e:
+                print(f"❌ 检查任务异常: {e}")
+        if time.time() >= next_checkpoint:
+            state.save()
+            next_checkpoint = time.time() + CHECKPOINT_INTERVAL
+
+    print("收到退出信号，保存记录...")
+    state.save()
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="B站UP主 AIGC 视频监控")
+    parser.add_argument("--daemon", action="store_true", help="常驻运行，按时发送报告（默认运行一次后退出）")
+    parser.add_argument("--poll-minutes", type=int, default=0,
+                        help="常驻模式下每隔多少分钟检查一次新视频并立即推送 (默认: 0，不检查)")
+    parser.add_argument("--report-time", default=REPORT_TIME,
+                        help=f"常驻模式下工作日发送报告的北京时间 (默认: {REPORT_TIME})")
+    return parser.parse_args()
 
 if __name__ == '__main__':
-    asyncio.run(main())
+    args = parse_args()
+    if args.daemon:
+        asyncio.run(daemon(args.poll_minutes, args.report_time))
+    else:
+        asyncio.run(main())
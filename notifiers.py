@@ -0,0 +1,379 @@
+"""
+推送渠道
+
+一份报告（标题 + 由 <ul>/<li>/<b>/<a> 组成的 HTML 片段）同时推送到所有已配置的渠道：
+飞书、钉钉、企业微信机器人和 SMTP 邮件。每个渠道有自己的格式、限速和重试策略，
+各渠道并发发送，总耗时取决于最慢的渠道，而不是各渠道耗时之和。
+
+渠道通过环境变量配置，未配置的渠道自动跳过：
+  FEISHU_WEBHOOK
+  DINGTALK_WEBHOOK, DINGTALK_SECRET (可选，加签)
+  WECOM_WEBHOOK
+  SMTP_HOST, SMTP_PORT, SMTP_USER, SMTP_PASSWORD, SMTP_FROM, SMTP_TO (逗号分隔), SMTP_SSL
+"""
+
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+import re
+import smtplib
+import time
+import urllib.parse
+from email.header import Header
+from email.mime.text import MIMEText
+
+import aiohttp
+
+# 机器人安全设置要求的关键词：飞书/钉钉机器人只接受包含关键词的消息
+KEYWORD_PREFIX = "B站 AIGC"
+
+
+class RetryableError(Exception):
+    """可重试的推送错误（超时、5xx、发送频率超限等）"""
+
+
+def with_keyword(title):
+    """标题中没有关键词时在前面加上"""
+    return title if "AIGC" in title else f"{KEYWORD_PREFIX} {title}"
+
+
+def html_to_text(content):
+    """纯文本格式：列表项变成 "- "，链接变成 "URL: 标题" """
+    return content \
+        .replace("<h3>", "").replace("</h3>", "\n") \
+        .replace("<ul>", "").replace("</ul>", "") \
+        .replace("<li style='margin-bottom:8px'>", "- ") \
+        .replace("<li>", "- ") \
+        .replace("</li>", "\n") \
+        .replace("<b>", "").replace("</b>", "") \
+        .replace("<a href='", "").replace("'>", ": ") \
+        .replace("</a>", "")
+
+
+def html_to_markdown(content):
+    """Markdown 格式：加粗和链接保留"""
+    text = re.sub(r"<li[^>]*>", "- ", content)
+    text = text.replace("</li>", "\n").replace("<ul>", "").replace("</ul>", "\n")
+    text = text.replace("<h3>", "### ").replace("</h3>", "\n")
+    text = text.replace("<b>", "**").replace("</b>", "**")
+    return re.sub(r"<a href='([^']*)'>(.*?)</a>", r"[\2](\1)", text)
+
+
+def split_message(text, max_bytes):
+    """按行把消息切成不超过 max_bytes (UTF-8) 的若干段"""
+    chunks, current, size = [], [], 0
+    for line in text.splitlines(keepends=True):
+        line_size = len(line.encode("utf-8"))
+        if current and size + line_size > max_bytes:
+            chunks.append("".join(current))
+            current, size = [], 0
+        current.append(line)
+        size += line_size
+    if current:
+        chunks.append("".join(current))
+    return chunks or [""]
+
+
+class Notifier:
+    """
+    推送渠道基类
+
+    子类实现 format() 把报告转换成一个或多个消息体，deliver() 发送单个消息体。
+    send() 负责限速（两条消息至少间隔 min_interval 秒）和重试（RetryableError 时按 backoff 指数退避）。
+    """
+    name = "notifier"
+    min_interval = 0.0
+    retries = 2
+    backoff = 2.0
+
+    def __init__(self):
+        self._lock = None
+        self._last_sent = 0.0
+
+    def format(self, content, title):
+        raise NotImplementedError
+
+    async def deliver(self, session, payload):
+        raise NotImplementedError
+
+    async def _throttle(self):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            wait = self._last_sent + self.min_interval - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self._last_sent = time.monotonic()
+
+    async def _send_one(self, session, payload):
+        for attempt in range(self.retries + 1):
+            await self._throttle()
+            try:
+                await self.deliver(session, payload)
+                return True
+            except RetryableError as e:
+                if attempt == self.retries:
+                    print(f"❌ [{self.name}] 推送失败，已重试 {self.retries} 次: {e}")
+                    return False
+                wait = self.backoff * 2 ** attempt
+                print(f"⚠️  [{self.name}] {e}，{wait:.0f} 秒后重试...")
+                await asyncio.sleep(wait)
+            except Exception as e:
+                print(f"❌ [{self.name}] 推送失败: {e}")
+                return False
+        return False
+
+    async def send(self, session, content, title):
+        """推送整份报告，所有分段都成功才返回 True"""
+        for payload in self.format(content, title):
+            if not await self._send_one(session, payload):
+                return False
+        return True
+
+
+class WebhookNotifier(Notifier):
+    """通过 HTTP POST JSON 推送的群机器人"""
+    max_bytes = 15000  # 单条消息正文上限，超过则分段发送
+
+    def __init__(self, webhook_url):
+        super().__init__()
+        self.webhook_url = webhook_url
+
+    def url(self):
+        return self.webhook_url
+
+    def render(self, content, title):
+        """报告转换成消息正文（不含标题）"""
+        return html_to_text(content)
+
+    def build(self, text, title):
+        """单段正文转换成请求体"""
+        raise NotImplementedError
+
+    def format(self, content, title):
+        chunks = split_message(self.render(content, title), self.max_bytes)
+        if len(chunks) == 1:
+            return [self.build(chunks[0], title)]
+        return [self.build(text, f"{title} ({i}/{len(chunks)})") for i, text in enumerate(chunks, 1)]
+
+    def check(self, data):
+        """检查响应体，失败时抛出异常"""
+        raise NotImplementedError
+
+    async def deliver(self, session, payload):
+        try:
+            async with session.post(self.url(), json=payload, timeout=aiohttp.ClientTimeout(total=10)) as resp:
+                if resp.status == 429 or resp.status >= 500:
+                    raise RetryableError(f"HTTP {resp.status}")
+                try:
+                    data = await resp.json(content_type=None)
+                except ValueError:
+                    raise Exception(f"响应不是有效的JSON (HTTP {resp.status}): {await resp.text()}")
+        except asyncio.TimeoutError:
+            raise RetryableError("推送超时")
+        except aiohttp.ClientConnectionError as e:
+            raise RetryableError(f"连接失败: {e}")
+        self.check(data)
+
+
+class FeishuNotifier(WebhookNotifier):
+    name = "飞书"
+    min_interval = 0.2  # 飞书机器人限制 5 条/秒
+    RETRYABLE_CODES = {9499, 11232}  # 请求过于频繁
+
+    def build(self, text, title):
+        # 确保消息包含飞书机器人要求的关键词（安全设置要求）
+        # 注意：使用 text 格式而不是 markdown，因为 markdown 格式中关键词可能无法被识别
+        # 测试发现：text 格式能正确识别关键词，markdown 格式会返回 code=19024
+        return {
+            "msg_type": "text",
+            "content": {"text": f"{KEYWORD_PREFIX}\n\n{title}\n\n" + text},
+        }
+
+    def check(self, data):
+        # code = 0 表示成功，code != 0 表示失败
+        code = data.get("code", data.get("StatusCode", -1))
+        if code == 0:
+            return
+        msg = data.get("msg", data.get("StatusMessage", ""))
+        if code in self.RETRYABLE_CODES:
+            raise RetryableError(f"code={code}: {msg}")
+        if code == 19024:
+            msg += "（飞书机器人要求消息包含特定关键词，请检查机器人安全设置）"
+        raise Exception(f"code={code}: {msg}")
+
+
+class DingTalkNotifier(WebhookNotifier):
+    name = "钉钉"
+    min_interval = 3.0  # 钉钉机器人限制 20 条/分钟
+    max_bytes = 15000
+    RETRYABLE_CODES = {130101}  # 发送速度太快
+
+    def __init__(self, webhook_url, secret=None):
+        super().__init__(webhook_url)
+        self.secret = secret
+
+    def url(self):
+        if not self.secret:
+            return self.webhook_url
+        # 加签：timestamp + "\n" + secret 的 HmacSHA256，Base64 后 URL 编码
+        timestamp = str(int(time.time() * 1000))
+        digest = hmac.new(self.secret.encode("utf-8"), f"{timestamp}\n{self.secret}".encode("utf-8"),
+                          hashlib.sha256).digest()
+        sign = urllib.parse.quote_plus(base64.b64encode(digest))
+        return f"{self.webhook_url}&timestamp={timestamp}&sign={sign}"
+
+    def render(self, content, title):
+        return html_to_markdown(content)
+
+    def build(self, text, title):
+        return {
+            "msgtype": "markdown",
+            "markdown": {"title": with_keyword(title), "text": f"## {with_keyword(title)}\n\n{text}"},
+        }
+
+    def check(self, data):
+        code = data.get("errcode", -1)
+        if code == 0:
+            return
+        if code in self.RETRYABLE_CODES:
+            raise RetryableError(f"errcode={code}: {data.get('errmsg', '')}")
+        raise Exception(f"errcode={code}: {data.get('errmsg', '')}")
+
+
+class WeComNotifier(WebhookNotifier):
+    name = "企业微信"
+    min_interval = 3.0  # 企业微信机器人限制 20 条/分钟
+    max_bytes = 3800  # markdown 消息上限 4096 字节，留出标题的空间
+    RETRYABLE_CODES = {45009}  # 接口调用超过限制
+
+    def render(self, content, title):
+        return html_to_markdown(content)
+
+    def build(self, text, title):
+        return {"msgtype": "markdown", "markdown": {"content": f"## {title}\n{text}"}}
+
+    def check(self, data):
+        code = data.get("errcode", -1)
+        if code == 0:
+            return
+        if code in self.RETRYABLE_CODES:
+            raise RetryableError(f"errcode={code}: {data.get('errmsg', '')}")
+        raise Exception(f"errcode={code}: {data.get('errmsg', '')}")
+
+
+class SmtpNotifier(Notifier):
+    """
+    邮件推送，整份报告作为一封 HTML 邮件
+
+    本地测试可以用调试 SMTP 服务器代替真实邮箱，例如
+    `python -m aiosmtpd -n -l localhost:1025` 后设置 SMTP_HOST=localhost SMTP_PORT=1025。
+    """
+    name = "邮件"
+
+    def __init__(self, host, port=25, user=None, password=None, sender=None, recipients=(), use_ssl=False):
+        super().__init__()
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.sender = sender or user or "monitor@localhost"
+        self.recipients = list(recipients)
+        self.use_ssl = use_ssl
+
+    def format(self, content, title):
+        message = MIMEText(f"<h3>{title}</h3>{content}", "html", "utf-8")
+        message["Subject"] = Header(with_keyword(title), "utf-8")
+        message["From"] = self.sender
+        message["To"] = ", ".join(self.recipients)
+        return [message]
+
+    def _send_sync(self, message):
+        smtp_class = smtplib.SMTP_SSL if self.use_ssl else smtplib.SMTP
+        with smtp_class(self.host, self.port, timeout=10) as smtp:
+            if self.user and self.password:
+                if not self.use_ssl and smtp.has_extn("starttls"):
+                    smtp.starttls()
+                smtp.login(self.user, self.password)
+            smtp.sendmail(self.sender, self.recipients, message.as_string())
+
+    async def deliver(self, session, payload):
+        try:
+            # smtplib 是同步的，放到线程里执行，不阻塞其他渠道
+            await asyncio.get_running_loop().run_in_executor(None, self._send_sync, payload)
+        except (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError) as e:
+            raise RetryableError(f"SMTP 连接失败: {e}")
+        except smtplib.SMTPException as e:
+            # 认证失败、收件人/发件人被拒、内容被拒等，重试无意义
+            # （SMTPException 是 OSError 的子类，必须在 OSError 之前处理）
+            raise Exception(f"SMTP 发送被拒绝: {e}")
+        except OSError as e:
+            raise RetryableError(f"SMTP 连接失败: {e}")
+
+
+def load_notifiers():
+    """
+    根据环境变量创建已配置的推送渠道
+
+    单个渠道配置有误（如 SMTP_PORT 不是数字）时只跳过该渠道，不影响其他渠道。
+    GitHub Actions 中未设置的 Secret 会以空字符串传入，按未设置处理。
+    """
+    factories = []
+    if os.environ.get("FEISHU_WEBHOOK"):
+        factories.append((FeishuNotifier, lambda: FeishuNotifier(os.environ["FEISHU_WEBHOOK"])))
+    if os.environ.get("DINGTALK_WEBHOOK"):
+        factories.append((DingTalkNotifier, lambda: DingTalkNotifier(
+            os.environ["DINGTALK_WEBHOOK"], os.environ.get("DINGTALK_SECRET"))))
+    if os.environ.get("WECOM_WEBHOOK"):
+        factories.append((WeComNotifier, lambda: WeComNotifier(os.environ["WECOM_WEBHOOK"])))
+    if os.environ.get("SMTP_HOST") and os.environ.get("SMTP_TO"):
+        factories.append((SmtpNotifier, lambda: SmtpNotifier(
+            os.environ["SMTP_HOST"],
+            int(os.environ.get("SMTP_PORT") or 25),
+            os.environ.get("SMTP_USER"),
+            os.environ.get("SMTP_PASSWORD"),
+            os.environ.get("SMTP_FROM"),
+            [addr.strip() for addr in os.environ["SMTP_TO"].split(",") if addr.strip()],
+            os.environ.get("SMTP_SSL", "").lower() in ("1", "true", "yes"),
+        )))
+    notifiers = []
+    for cls, factory in factories:
+        try:
+            notifiers.append(factory())
+        except Exception as e:
+            print(f"⚠️  [{cls.name}] 配置无效，已跳过: {e}")
+    return notifiers
+
+
+_notifiers = None
+
+
+async def notify_all(content, title, notifiers=None):
+    """
+    把报告并发推送到所有渠道
+
+    Returns:
+        {渠道名: 是否成功}；没有配置任何渠道时为空字典
+    """
+    global _notifiers
+    if notifiers is None:
+        # 同一进程（常驻模式）复用渠道对象，限速状态跨多次推送保持
+        if _notifiers is None:
+            _notifiers = load_notifiers()
+        notifiers = _notifiers
+    if not notifiers:
+        return {}
+    async with aiohttp.ClientSession() as session:
+        results = await asyncio.gather(*(n.send(session, content, title) for n in notifiers),
+                                       return_exceptions=True)
+    status = {}
+    for n, result in zip(notifiers, results):
+        if isinstance(result, Exception):
+            print(f"❌ [{n.name}] 推送异常: {result}")
+            result = False
+        if result:
+            print(f"✅ [{n.name}] 推送成功")
+        status[n.name] = result
+    return status
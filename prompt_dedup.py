@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+提示词近似去重
+
+用词集合的 MinHash 签名 + LSH 分桶查找近似重复的提示词，
+每条提示词只与同桶的候选比较，整体耗时与数量近似线性，而不是两两比较的平方级。
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import sys
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+# Mersenne 素数 2^61-1，用于通用哈希 (a*x + b) mod p
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)*")
+
+
+def tokenize(prompt: str, ignore: Optional[Set[str]] = None) -> Set[str]:
+    """把提示词切成小写单词集合，并去掉 ignore 中的词（如所有卡牌共有的质量标签）"""
+    tokens = set(TOKEN_PATTERN.findall(prompt.lower()))
+    if ignore:
+        tokens -= ignore
+    return tokens
+
+
+def jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def lsh_params(num_perm: int, threshold: float) -> Tuple[int, int]:
+    """
+    选择分段数 bands 和每段行数 rows (bands * rows <= num_perm)
+
+    两条相似度为 s 的提示词至少落入一个同桶的概率是 1 - (1 - s^rows)^bands，
+    其拐点约为 (1/bands)^(1/rows)，取最接近阈值且略低于阈值的组合以减少漏检。
+    """
+    best = None
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        knee = (1 / bands) ** (1 / rows)
+        score = abs(knee - threshold) + (0.05 if knee > threshold else 0)
+        if best is None or score < best[0]:
+            best = (score, bands, rows)
+    return best[1], best[2]
+
+
+class NearDuplicateIndex:
+    """
+    增量式 MinHash LSH 索引
+
+    query() 返回与给定提示词的词集合 Jaccard 相似度不低于 threshold 的已收录项，
+    add() 收录一条提示词。候选先由 LSH 分桶筛出，再用精确 Jaccard 复核，因此不会误报。
+    """
+
+    def __init__(self, threshold: float = 0.85, num_perm: int = 64, seed: int = 1,
+                 ignore: Optional[Set[str]] = None):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.ignore = ignore or set()
+        self.bands, self.rows = lsh_params(num_perm, threshold)
+        rng = np.random.default_rng(seed)
+        # a < 2^31、x < 2^32，保证 a*x + b 不会溢出 uint64
+        self._a = rng.integers(1, 1 << 31, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 1 << 60, size=num_perm, dtype=np.uint64)
+        self._token_hashes: Dict[str, int] = {}
+        self._buckets: List[Dict[bytes, List[int]]] = [{} for _ in range(self.bands)]
+        self._tokens: List[Set[str]] = []
+
+    def _hash(self, token: str) -> int:
+        value = self._token_hashes.get(token)
+        if value is None:
+            value = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=4).digest(), "little")
+            self._token_hashes[token] = value
+        return value
+
+    def signature(self, tokens: Set[str]) -> np.ndarray:
+        """计算词集合的 MinHash 签名（num_perm 个最小哈希值）"""
+        if not tokens:
+            return np.full(self.num_perm, MERSENNE_PRIME, dtype=np.uint64)
+        hashes = np.fromiter((self._hash(t) for t in tokens), dtype=np.uint64, count=len(tokens))
+        permuted = (np.outer(hashes, self._a) + self._b) % MERSENNE_PRIME
+        return permuted.min(axis=0)
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def query(self, tokens: Set[str], signature: Optional[np.ndarray] = None) -> List[Tuple[int, float]]:
+        """返回 [(已收录项编号, 相似度), ...]，按相似度从高到低排序"""
+        if signature is None:
+            signature = self.signature(tokens)
+        candidates = set()
+        for band, key in enumerate(self._band_keys(signature)):
+            candidates.update(self._buckets[band].get(key, ()))
+        matches = []
+        for candidate in candidates:
+            similarity = jaccard(tokens, self._tokens[candidate])
+            if similarity >= self.threshold:
+                matches.append((candidate, similarity))
+        return sorted(matches, key=lambda m: -m[1])
+
+    def add(self, tokens: Set[str], signature: Optional[np.ndarray] = None) -> int:
+        """收录一条提示词，返回其编号"""
+        if signature is None:
+            signature = self.signature(tokens)
+        item = len(self._tokens)
+        self._tokens.append(tokens)
+        for band, key in enumerate(self._band_keys(signature)):
+            self._buckets[band].setdefault(key, []).append(item)
+        return item
+
+    def add_if_new(self, prompt: str) -> Tuple[bool, List[Tuple[int, float]]]:
+        """
+        若与已收录项都不近似则收录
+
+        Returns:
+            (是否收录, 近似的已收录项列表)
+        """
+        tokens = tokenize(prompt, self.ignore)
+        signature = self.signature(tokens)
+        matches = self.query(tokens, signature)
+        if matches:
+            return False, matches
+        self.add(tokens, signature)
+        return True, []
+
+
+def find_near_duplicates(prompts: Iterable[str], threshold: float = 0.85, num_perm: int = 64,
+                         ignore: Optional[Set[str]] = None) -> List[Tuple[int, int, float]]:
+    """
+    找出一批提示词中的近似重复
+
+    Returns:
+        [(重复项序号, 与之近似的较早一条的序号, 相似度), ...]
+    """
+    index = NearDuplicateIndex(threshold, num_perm, ignore=ignore)
+    kept: List[int] = []
+    duplicates = []
+    for i, prompt in enumerate(prompts):
+        added, matches = index.add_if_new(prompt)
+        if added:
+            kept.append(i)
+        else:
+            duplicates.append((i, kept[matches[0][0]], matches[0][1]))
+    return duplicates
+
+
+def main():
+    parser = argparse.ArgumentParser(description="报告 JSONL 提示词文件中的近似重复项")
+    parser.add_argument("files", nargs="+", help="JSONL 文件（每行含 prompt 字段）")
+    parser.add_argument("--threshold", type=float, default=0.85, help="Jaccard 相似度阈值 (默认: 0.85)")
+    parser.add_argument("--num-perm", type=int, default=64, help="MinHash 签名长度 (默认: 64)")
+    parser.add_argument("--ignore", default="", help="比较时忽略的词，逗号分隔（如共有的质量标签）")
+    args = parser.parse_args()
+
+    records = []
+    for path in args.files:
+        with open(path, "r", encoding="utf-8") as f:
+            for line_no, line in enumerate(f, 1):
+                if line.strip():
+                    records.append((path, line_no, json.loads(line)["prompt"]))
+
+    ignore = tokenize(args.ignore.replace(",", " ")) if args.ignore else None
+    duplicates = find_near_duplicates((r[2] for r in records), args.threshold, args.num_perm, ignore)
+    for dup, original, similarity in duplicates:
+        print(f"{records[dup][0]}:{records[dup][1]} ≈ {records[original][0]}:{records[original][1]} "
+              f"(相似度 {similarity:.2f})")
+    print(f"共 {len(records)} 条提示词，近似重复 {len(duplicates)} 条", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+main.py 的离线测试：用桩对象代替 bilibili_api 的网络请求
+"""
+
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main  # noqa: E402
+
+
+@pytest.fixture
+def state(tmp_path):
+    return SimpleNamespace(
+        memory=main.HistoryManager(str(tmp_path / "history.bin"), str(tmp_path / "history.json")),
+        scheduler=main.PollScheduler(str(tmp_path / "schedule.json")),
+        breaker=main.CircuitBreaker(str(tmp_path / "health.json")),
+    )
+
+
+@pytest.fixture
+def no_sleep(monkeypatch):
+    real_sleep = asyncio.sleep
+
+    async def fast_sleep(delay, *args, **kwargs):
+        await real_sleep(0)
+
+    monkeypatch.setattr(asyncio, "sleep", fast_sleep)
+
+
+def test_risk_control_stops_queued_fetches(monkeypatch, state, no_sleep):
+    from bilibili_api import user
+    from bilibili_api.exceptions import ResponseCodeException
+
+    requests = []
+
+    class RiskUser:
+        def __init__(self, uid, credential=None):
+            self.uid = uid
+
+        async def get_videos(self, ps=30):
+            requests.append(self.uid)
+            raise ResponseCodeException(-352, "风控校验失败", {})
+
+    monkeypatch.setattr(user, "User", RiskUser)
+    config = {"title": "test", "window": 26 * 3600, "now": main.time.time()}
+
+    videos, success_count, fail_count = asyncio.run(main.collect_videos(config, None, state))
+
+    # 只有最先拿到信号量的请求会发出，之后排队的请求看到全局退避直接放弃（原来是 25 × 3 次）
+    assert len(requests) <= main.CONCURRENCY_LIMIT * 3
+    assert (videos, success_count, fail_count) == ([], 0, len(main.TARGET_UIDS))
+    assert state.breaker.global_open()
+    assert state.breaker.data["risk"]["trips"] == 1
+
+
+def test_rank_by_velocity_uses_growth_since_publish():
+    now = 1_700_000_000
+    videos = [
+        {'bvid': 'old', 'created': now - 100 * 3600, 'stat': {'view': 10000, 'reply': 0}},
+        {'bvid': 'new', 'created': now - 2 * 3600, 'stat': {'view': 500, 'reply': 10}},
+        {'bvid': 'missing', 'created': now - 3600},
+    ]
+    ranked = main.rank_by_velocity(videos, now)
+    assert [v['bvid'] for v in ranked] == ['new', 'old', 'missing']
+    assert ranked[0]['velocity'] == (500 + main.REPLY_WEIGHT * 10) / 2
+
+
+BOILERPLATE = "本期视频用到的工作流和模型都放在评论区置顶，欢迎一键三连，有问题可以在群里交流，下期见！" * 2
+
+
+def _video(bvid, title, author, mid, created, desc=BOILERPLATE):
+    return {'bvid': bvid, 'title': title, 'description': desc, 'author': author, 'mid': mid, 'created': created}
+
+
+def test_collapse_merges_reposts_across_uploaders_only(tmp_path):
+    collapser = main.DuplicateCollapser(str(tmp_path / "fingerprints.json"))
+    videos = [
+        _video("BV1", "【ComfyUI教程】第3集 Flux 局部重绘工作流", "UP甲", 1, 100),
+        _video("BV2", "【ComfyUI教程】第4集 Flux 局部重绘工作流", "UP甲", 1, 200),
+        _video("BV3", "【ComfyUI教程】第3集 Flux 局部重绘工作流", "搬运号", 2, 300, desc="转载自UP甲"),
+        _video("BV5", "SD3.5 和 Flux 模型对比测评", "UP丙", 3, 250),
+    ]
+    kept = collapser.collapse(videos)
+    # 同一UP主的连续剧集、以及只是简介模板相同的其他UP主视频都保留
+    assert [v['bvid'] for v in kept] == ["BV1", "BV2", "BV5"]
+    assert [d['bvid'] for d in kept[0]['duplicates']] == ["BV3"]
+
+    # 同一UP主的下一集在后续运行中也不会被当作重复跳过
+    later = collapser.collapse([_video("BV4", "【ComfyUI教程】第5集 Flux 局部重绘工作流", "UP甲", 1, 400)])
+    assert [v['bvid'] for v in later] == ["BV4"]
+
+
+def test_collapser_save_expires_in_memory_index(tmp_path, monkeypatch):
+    collapser = main.DuplicateCollapser(str(tmp_path / "fingerprints.json"))
+    collapser.collapse([_video("BV1", "Flux 局部重绘工作流分享", "UP甲", 1, 100)])
+    monkeypatch.setattr(main.time, "time", lambda: main.time.monotonic() + 1e10)
+    collapser.save()
+    assert collapser.entries == []
+    kept = collapser.collapse([_video("BV2", "Flux 局部重绘工作流分享", "UP乙", 2, 200)])
+    assert [v['bvid'] for v in kept] == ["BV2"]
+
+
+def test_feed_page_cap_falls_back_to_per_uid_requests(monkeypatch, state, no_sleep):
+    from bilibili_api import dynamic, user
+
+    now = main.time.time()
+    uid = main.TARGET_UIDS[0]
+
+    async def endless_feed(credential, _type=None, offset=None):
+        # 每页都是窗口内的新视频，翻到上限也到不了窗口起点
+        item = {'modules': {
+            'module_author': {'name': 'UP甲', 'mid': uid, 'pub_ts': int(now) - 60},
+            'module_dynamic': {'major': {'archive': {'bvid': 'BV1xx411c7mD', 'aid': 2, 'title': 'Flux 工作流'}}},
+        }}
+        return {'items': [item], 'offset': 'next', 'has_more': True}
+
+    requests = []
+
+    class StubUser:
+        def __init__(self, uid, credential=None):
+            self.uid = uid
+
+        async def get_followings(self, pn=1, ps=100):
+            return {'list': [{'mid': u} for u in main.TARGET_UIDS]}
+
+        async def get_videos(self, ps=30):
+            requests.append(self.uid)
+            return {'list': {'vlist': []}}
+
+    monkeypatch.setattr(dynamic, "get_dynamic_page_info", endless_feed)
+    monkeypatch.setattr(user, "User", StubUser)
+    credential = SimpleNamespace(dedeuserid="1")
+    config = {"title": "test", "window": 7 * 24 * 3600, "now": now}
+
+    videos, covered = asyncio.run(main.fetch_following_feed(credential, config))
+    assert len(videos) == main.FEED_MAX_PAGES
+    assert covered == set()
+
+    asyncio.run(main.collect_videos(config, credential, state))
+    assert sorted(requests) == sorted(main.TARGET_UIDS)
@@ -0,0 +1,65 @@
+"""
+notifiers.py 的离线测试
+"""
+
+import asyncio
+import os
+import smtplib
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import notifiers  # noqa: E402
+
+
+def _smtp_attempts(monkeypatch, error):
+    notifier = notifiers.SmtpNotifier("localhost", recipients=["a@example.com"])
+    notifier.backoff = 0
+    attempts = []
+
+    def failing_send(message):
+        attempts.append(message)
+        raise error
+
+    monkeypatch.setattr(notifier, "_send_sync", failing_send)
+    assert asyncio.run(notifier.send(None, "<p>ComfyUI</p>", "日报")) is False
+    return len(attempts)
+
+
+@pytest.mark.parametrize("error", [
+    smtplib.SMTPAuthenticationError(535, b"authentication failed"),
+    smtplib.SMTPRecipientsRefused({"a@example.com": (550, b"no such user")}),
+    smtplib.SMTPSenderRefused(553, b"sender rejected", "monitor@localhost"),
+    smtplib.SMTPDataError(554, b"message rejected"),
+])
+def test_smtp_rejections_are_not_retried(monkeypatch, error):
+    assert _smtp_attempts(monkeypatch, error) == 1
+
+
+@pytest.mark.parametrize("error", [
+    ConnectionRefusedError("connection refused"),
+    smtplib.SMTPServerDisconnected("closed"),
+])
+def test_smtp_connection_errors_are_retried(monkeypatch, error):
+    assert _smtp_attempts(monkeypatch, error) == notifiers.SmtpNotifier.retries + 1
+
+
+def test_empty_or_invalid_smtp_port(monkeypatch, capsys):
+    for name in ("DINGTALK_WEBHOOK", "WECOM_WEBHOOK"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("FEISHU_WEBHOOK", "https://example.com/hook")
+    monkeypatch.setenv("SMTP_HOST", "smtp.example.com")
+    monkeypatch.setenv("SMTP_TO", "a@example.com")
+
+    # GitHub Actions 把未设置的 Secret 传为空字符串
+    monkeypatch.setenv("SMTP_PORT", "")
+    smtp = [n for n in notifiers.load_notifiers() if isinstance(n, notifiers.SmtpNotifier)]
+    assert [n.port for n in smtp] == [25]
+
+    # 配置错误只跳过该渠道
+    monkeypatch.setenv("SMTP_PORT", "abc")
+    loaded = notifiers.load_notifiers()
+    assert [type(n) for n in loaded] == [notifiers.FeishuNotifier]
+    assert "配置无效" in capsys.readouterr().out
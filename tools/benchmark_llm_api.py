@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark of llm_api against the local mock server.
+
+Measures, on one machine and without keys or network:
+  - per-call overhead of query_llm over a raw HTTP round trip
+  - the cost of creating a client per call instead of reusing one
+  - throughput scaling with concurrent callers
+  - the effect of the image preparation cache
+"""
+
+import argparse
+import base64
+import http.client
+import json
+import mimetypes
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from mock_llm_server import MockConfig, start_server
+
+def _time_calls(fn, n: int) -> list:
+    """Run fn n times and return per-call durations in seconds."""
+    durations = []
+    for _ in range(n):
+        start = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+def _ms(values: list) -> str:
+    return f"{statistics.median(values) * 1000:8.2f} ms"
+
+def _raw_openai_call(host: str, port: int) -> None:
+    """Baseline: one streamed chat completion over plain http.client."""
+    conn = http.client.HTTPConnection(host, port)
+    body = json.dumps({'model': 'mock', 'stream': True,
+                       'messages': [{'role': 'user', 'content': 'hello'}]})
+    conn.request('POST', '/v1/chat/completions', body, {'Content-Type': 'application/json'})
+    conn.getresponse().read()
+    conn.close()
+
+def encode_image_file(image_path: str) -> tuple:
+    """Baseline: read and base64-encode the image as-is, without resizing or caching."""
+    mime_type, _ = mimetypes.guess_type(image_path)
+    with open(image_path, "rb") as image_file:
+        return base64.b64encode(image_file.read()).decode('utf-8'), mime_type or 'image/png'
+
+def bench_overhead(llm_api, host: str, port: int, calls: int) -> None:
+    print(f"\n== Per-call overhead (median of {calls} calls, no server latency) ==")
+    raw = _time_calls(lambda: _raw_openai_call(host, port), calls)
+    local_client = llm_api.create_llm_client('local')
+    local = _time_calls(lambda: llm_api.query_llm('hello', local_client, provider='local'), calls)
+    anthropic_client = llm_api.create_llm_client('anthropic')
+    anthropic = _time_calls(lambda: llm_api.query_llm('hello', anthropic_client, provider='anthropic'), calls)
+    fresh = _time_calls(lambda: llm_api.query_llm('hello', provider='local'), calls)
+    print(f"raw HTTP round trip           {_ms(raw)}")
+    print(f"query_llm local (OpenAI API)  {_ms(local)}  (+{(statistics.median(local) - statistics.median(raw)) * 1000:.2f} ms)")
+    print(f"query_llm anthropic           {_ms(anthropic)}")
+    print(f"query_llm new client per call {_ms(fresh)}  (+{(statistics.median(fresh) - statistics.median(local)) * 1000:.2f} ms vs reused)")
+
+def bench_concurrency(llm_api, server, calls: int, latency: float, levels: list) -> None:
+    print(f"\n== Concurrency scaling ({calls} calls, {latency * 1000:.0f} ms server latency) ==")
+    server.config.latency = latency
+    client = llm_api.create_llm_client('local')
+    baseline = None
+    try:
+        for workers in levels:
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                list(pool.map(lambda _: llm_api.query_llm('hello', client, provider='local'), range(calls)))
+            elapsed = time.perf_counter() - start
+            throughput = calls / elapsed
+            baseline = baseline or throughput
+            print(f"{workers:3d} workers  {throughput:8.1f} calls/s  x{throughput / baseline:.2f}")
+    finally:
+        server.config.latency = 0.0
+
+def bench_image_cache(llm_api, calls: int) -> None:
+    print("\n== Image preparation cache ==")
+    try:
+        from PIL import Image, ImageDraw
+    except ImportError:
+        print("Pillow not installed, skipping")
+        return
+    # A tall, text-like "screenshot"
+    image = Image.new('RGB', (1280, 6000), 'white')
+    draw = ImageDraw.Draw(image)
+    for y in range(0, 6000, 24):
+        draw.text((20, y), "lorem ipsum dolor sit amet " * 6, fill='black')
+    path = os.path.join(tempfile.mkdtemp(), 'screenshot.png')
+    image.save(path)
+
+    llm_api._image_cache.clear()
+    start = time.perf_counter()
+    llm_api.prepare_image(path, 'anthropic')
+    cold = time.perf_counter() - start
+    warm = _time_calls(lambda: llm_api.prepare_image(path, 'anthropic'), calls)
+    raw = _time_calls(lambda: encode_image_file(path), calls)
+    print(f"prepare_image first call      {cold * 1000:8.2f} ms")
+    print(f"prepare_image cached          {_ms(warm)}")
+    print(f"encode_image_file (raw)       {_ms(raw)}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark llm_api against a local mock server')
+    parser.add_argument('--calls', type=int, default=50, help='Calls per measurement (default: 50)')
+    parser.add_argument('--latency', type=float, default=0.05,
+                        help='Server latency for the concurrency test in seconds (default: 0.05)')
+    parser.add_argument('--concurrency', type=str, default='1,2,4,8,16',
+                        help='Comma-separated worker counts (default: 1,2,4,8,16)')
+    parser.add_argument('--chunks', type=int, default=20, help='Words per mock reply (default: 20)')
+    args = parser.parse_args()
+
+    server = start_server(MockConfig(chunks=args.chunks))
+    host, port = server.server_address[:2]
+    os.environ['LOCAL_LLM_BASE_URL'] = f"http://{host}:{port}/v1"
+    os.environ['ANTHROPIC_BASE_URL'] = f"http://{host}:{port}"
+    os.environ['ANTHROPIC_API_KEY'] = 'mock'
+
+    import llm_api
+    llm_api.LLM_LOG_PATH = os.path.join(tempfile.mkdtemp(), 'llm_calls.jsonl')
+
+    try:
+        bench_overhead(llm_api, host, port, args.calls)
+        bench_concurrency(llm_api, server, args.calls,
+                          args.latency, [int(n) for n in args.concurrency.split(',')])
+        bench_image_cache(llm_api, args.calls)
+        print("\n== Call log summary ==")
+        llm_api.print_llm_summary()
+    finally:
+        server.shutdown()
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,7 +1,7 @@
 #!/usr/bin/env /workspace/tmp_windsurf/venv/bin/python3
 
 import google.generativeai as genai
-from openai import OpenAI, AzureOpenAI
+from openai import OpenAI, AzureOpenAI, BadRequestError, UnprocessableEntityError
 from anthropic import Anthropic
 import argparse
 import os
@@ -9,6 +9,14 @@ from dotenv import load_dotenv
 from pathlib import Path
 import sys
 import base64
+import hashlib
+import io
+import json
+import math
+import random
+import time
+import threading
+from concurrent.futures import Future, wait, FIRST_COMPLETED
 from typing import Optional, Union, List
 import mimetypes
 
@@ -46,24 +54,114 @@ def load_environment():
 # Load environment variables at module import
 load_environment()
 
-def encode_image_file(image_path: str) -> tuple[str, str]:
+# Longest image edge each provider uses without downscaling on its side
+IMAGE_MAX_EDGE = {
+    "openai": 2048,
+    "azure": 2048,
+    "anthropic": 1568,
+    "gemini": 3072,
+}
+# Images taller than this ratio (e.g. full-page screenshots) are split into tiles
+IMAGE_MAX_ASPECT = 2.0
+IMAGE_MAX_TILES = 8
+IMAGE_JPEG_QUALITY = 85
+
+# Prepared payloads and Gemini uploads, keyed by image content hash
+_image_cache = {}
+_gemini_file_cache = {}
+
+# (provider, base URL) pairs whose server rejected stream_options, e.g. older
+# Azure API versions and some local servers; they stream without usage data
+_stream_usage_rejected = set()
+
+def _prepare_image_bytes(image_path: str, provider: str) -> tuple[str, List[tuple[bytes, str]]]:
     """
-    Encode an image file to base64 and determine its MIME type.
-    
+    Downscale, tile and re-encode an image for a provider.
+
+    Images with at most 256 colours (screenshots, diagrams) are kept as PNG,
+    palette-quantized back to the source colour count after resizing; other
+    images are encoded as JPEG and as PNG and the smaller one is kept.
+
+    Returns (content_hash, [(image_bytes, mime_type), ...]). Results are cached
+    by content hash and provider, so repeated calls for the same image are
+    free. Without Pillow, or when the original already fits the provider's
+    size and aspect limits and re-encoding would not make it smaller, the
+    original bytes are used unchanged.
+    """
+    with open(image_path, "rb") as image_file:
+        raw = image_file.read()
+    digest = hashlib.sha256(raw).hexdigest()
+    key = (digest, provider)
+    if key in _image_cache:
+        return digest, _image_cache[key]
+
+    mime_type, _ = mimetypes.guess_type(image_path)
+    original = [(raw, mime_type or 'image/png')]
+    try:
+        from PIL import Image
+    except ImportError:
+        _image_cache[key] = original
+        return digest, original
+
+    def encode(image, fmt: str, **options) -> tuple[bytes, str]:
+        buffer = io.BytesIO()
+        image.save(buffer, format=fmt, **options)
+        return buffer.getvalue(), f"image/{fmt.lower()}"
+
+    max_edge = IMAGE_MAX_EDGE.get(provider, 2048)
+    with Image.open(io.BytesIO(raw)) as source:
+        colours = source.getcolors(256)  # None when the image has more than 256 colours
+        grey = source.mode in ("1", "L", "LA", "I", "I;16")
+        image = source.convert("L" if grey else "RGB")
+    width, height = image.size
+    fits = max(width, height) <= max_edge and height <= width * IMAGE_MAX_ASPECT
+    tile_height = height
+    if height > width * IMAGE_MAX_ASPECT:
+        tile_height = max(int(width * IMAGE_MAX_ASPECT), math.ceil(height / IMAGE_MAX_TILES))
+    tiles = []
+    for top in range(0, height, tile_height):
+        tile = image.crop((0, top, width, min(top + tile_height, height)))
+        tile.thumbnail((max_edge, max_edge), Image.LANCZOS)
+        if colours is not None:
+            # Few colours: JPEG only adds artefacts, while a palette PNG compresses flat areas well
+            method = Image.Quantize.MEDIANCUT if grey else Image.Quantize.FASTOCTREE
+            tiles.append(encode(tile.quantize(len(colours), method=method, dither=Image.Dither.NONE), "PNG"))
+        else:
+            tiles.append(min(encode(tile, "JPEG", quality=IMAGE_JPEG_QUALITY, optimize=True),
+                             encode(tile, "PNG"), key=lambda e: len(e[0])))
+
+    prepared = tiles
+    if fits and sum(len(data) for data, _ in tiles) >= len(raw):
+        prepared = original
+    new_size = sum(len(data) for data, _ in prepared)
+    saved = len(raw) - new_size
+    print(f"Image {image_path}: {len(raw)} -> {new_size} bytes in {len(prepared)} part(s) "
+          f"(saved {saved} bytes, {saved / max(len(raw), 1):.0%})", file=sys.stderr)
+    _image_cache[key] = prepared
+    return digest, prepared
+
+def prepare_image(image_path: str, provider: str = "openai") -> List[tuple[str, str]]:
+    """
+    Prepare an image for a provider's message payload.
+
     Args:
         image_path (str): Path to the image file
-        
+        provider (str): The API provider the image is sent to
+
     Returns:
-        tuple: (base64_encoded_string, mime_type)
+        list: [(base64_encoded_string, mime_type), ...], one entry per tile
     """
-    mime_type, _ = mimetypes.guess_type(image_path)
-    if not mime_type:
-        mime_type = 'image/png'  # Default to PNG if type cannot be determined
-        
-    with open(image_path, "rb") as image_file:
-        encoded_string = base64.b64encode(image_file.read()).decode('utf-8')
-        
-    return encoded_string, mime_type
+    _, parts = _prepare_image_bytes(image_path, provider)
+    return [(base64.b64encode(data).decode('utf-8'), mime_type) for data, mime_type in parts]
+
+def upload_gemini_image(image_path: str) -> list:
+    """Upload a prepared image to Gemini, reusing earlier uploads of the same content."""
+    digest, parts = _prepare_image_bytes(image_path, "gemini")
+    if digest not in _gemini_file_cache:
+        _gemini_file_cache[digest] = [
+            genai.upload_file(io.BytesIO(data), mime_type=mime_type) for data, mime_type in parts
+        ]
+    return _gemini_file_cache[digest]
 
 def create_llm_client(provider="openai"):
     if provider == "openai":
@@ -113,16 +211,203 @@ def create_llm_client(provider="openai"):
         return genai
     elif provider == "local":
         return OpenAI(
-            base_url="http://192.168.180.137:8006/v1",
+            base_url=os.getenv('LOCAL_LLM_BASE_URL', "http://192.168.180.137:8006/v1"),
             api_key="not-needed"
         )
     else:
         raise ValueError(f"Unsupported provider: {provider}")
 
+LLM_LOG_PATH = os.getenv('LLM_LOG_PATH', os.path.join('.cache', 'llm_calls.jsonl'))
+
+def log_llm_call(record: dict, path: Optional[str] = None) -> None:
+    """Append one call record to the JSONL call log."""
+    path = path or LLM_LOG_PATH
+    try:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+    except OSError as e:
+        print(f"Warning: could not write LLM call log {path}: {e}", file=sys.stderr)
+
+def default_model(provider: str) -> Optional[str]:
+    """Return the default model for a provider."""
+    if provider == "openai":
+        return "gpt-4o"
+    elif provider == "azure":
+        return os.getenv('AZURE_OPENAI_MODEL_DEPLOYMENT', 'gpt-4o-ms')  # Get from env with fallback
+    elif provider == "deepseek":
+        return "deepseek-chat"
+    elif provider == "siliconflow":
+        return "deepseek-ai/DeepSeek-R1"
+    elif provider == "anthropic":
+        return "claude-3-7-sonnet-20250219"
+    elif provider == "gemini":
+        return "gemini-2.0-flash-exp"
+    elif provider == "local":
+        return "Qwen/Qwen2.5-32B-Instruct-AWQ"
+    return None
+
+def _call_llm(prompt: str, client, model: str, provider: str, image_path: Optional[str],
+              stats: dict) -> Optional[str]:
+    """
+    Send one request and return the response text, raising on errors.
+
+    Responses are streamed so that time to first token can be measured;
+    stats is filled in with 'ttft' (seconds from stats['start']) and
+    'input_tokens'/'output_tokens' as reported by the provider.
+    """
+    def first_token():
+        if stats.get('ttft') is None:
+            stats['ttft'] = time.perf_counter() - stats['start']
+
+    if provider in ["openai", "local", "deepseek", "azure", "siliconflow"]:
+        messages = [{"role": "user", "content": []}]
+        
+        # Add text content
+        messages[0]["content"].append({
+            "type": "text",
+            "text": prompt
+        })
+        
+        # Add image content if provided
+        if image_path:
+            if provider == "openai":
+                messages[0]["content"] = [{"type": "text", "text": prompt}] + [
+                    {"type": "image_url", "image_url": {"url": f"data:{mime_type};base64,{encoded_image}"}}
+                    for encoded_image, mime_type in prepare_image(image_path, provider)
+                ]
+        
+        kwargs = {
+            "model": model,
+            "messages": messages,
+            "temperature": 0.7,
+        }
+        
+        # Add o1-specific parameters
+        if model == "o1":
+            kwargs["response_format"] = {"type": "text"}
+            kwargs["reasoning_effort"] = "low"
+            del kwargs["temperature"]
+            # o1 does not stream, so only total latency is known
+            response = client.chat.completions.create(**kwargs)
+            if response.usage:
+                stats['input_tokens'] = response.usage.prompt_tokens
+                stats['output_tokens'] = response.usage.completion_tokens
+            return response.choices[0].message.content
+        
+        kwargs["stream"] = True
+        endpoint = (provider, str(getattr(client, "base_url", "")))
+        if endpoint not in _stream_usage_rejected:
+            kwargs["stream_options"] = {"include_usage": True}
+        try:
+            response = client.chat.completions.create(**kwargs)
+        except (BadRequestError, UnprocessableEntityError) as e:
+            if "stream_options" not in kwargs or "stream_options" not in str(e):
+                raise
+            _stream_usage_rejected.add(endpoint)
+            del kwargs["stream_options"]
+            response = client.chat.completions.create(**kwargs)
+        parts = []
+        for chunk in response:
+            if getattr(chunk, "usage", None):
+                stats['input_tokens'] = chunk.usage.prompt_tokens
+                stats['output_tokens'] = chunk.usage.completion_tokens
+            if chunk.choices and chunk.choices[0].delta.content:
+                first_token()
+                parts.append(chunk.choices[0].delta.content)
+        return "".join(parts)
+        
+    elif provider == "anthropic":
+        messages = [{"role": "user", "content": []}]
+        
+        # Add text content
+        messages[0]["content"].append({
+            "type": "text",
+            "text": prompt
+        })
+        
+        # Add image content if provided
+        if image_path:
+            for encoded_image, mime_type in prepare_image(image_path, provider):
+                messages[0]["content"].append({
+                    "type": "image",
+                    "source": {
+                        "type": "base64",
+                        "media_type": mime_type,
+                        "data": encoded_image
+                    }
+                })
+        
+        with client.messages.stream(
+            model=model,
+            max_tokens=1000,
+            messages=messages
+        ) as stream:
+            for _ in stream.text_stream:
+                first_token()
+            response = stream.get_final_message()
+        stats['input_tokens'] = response.usage.input_tokens
+        stats['output_tokens'] = response.usage.output_tokens
+        return response.content[0].text
+        
+    elif provider == "gemini":
+        model = client.GenerativeModel(model)
+        if image_path:
+            files = upload_gemini_image(image_path)
+            chat_session = model.start_chat(
+                history=[{
+                    "role": "user",
+                    "parts": files + [prompt]
+                }]
+            )
+        else:
+            chat_session = model.start_chat(
+                history=[{
+                    "role": "user",
+                    "parts": [prompt]
+                }]
+            )
+        response = chat_session.send_message(prompt, stream=True)
+        for _ in response:
+            first_token()
+        usage = getattr(response, "usage_metadata", None)
+        if usage:
+            stats['input_tokens'] = usage.prompt_token_count
+            stats['output_tokens'] = usage.candidates_token_count
+        return response.text
+
+    raise ValueError(f"Unsupported provider: {provider}")
+
+def _instrumented_call(prompt: str, client, model: str, provider: str, image_path: Optional[str],
+                       retries: int = 0) -> tuple[Optional[str], dict]:
+    """
+    Run _call_llm, timing it and appending a record to the call log.
+
+    Returns (response, record); exceptions are re-raised after logging.
+    """
+    stats = {'start': time.perf_counter(), 'ttft': None, 'input_tokens': None, 'output_tokens': None}
+    record = {'time': time.time(), 'provider': provider, 'model': model, 'retries': retries}
+    try:
+        response = _call_llm(prompt, client, model, provider, image_path, stats)
+        record['ok'] = True
+        return response, record
+    except Exception as e:
+        record['ok'] = False
+        record['error'] = str(e)[:200]
+        raise
+    finally:
+        record['latency'] = round(time.perf_counter() - stats['start'], 4)
+        record['ttft'] = round(stats['ttft'], 4) if stats['ttft'] is not None else None
+        record['input_tokens'] = stats['input_tokens']
+        record['output_tokens'] = stats['output_tokens']
+        log_llm_call(record)
+
 def query_llm(prompt: str, client=None, model=None, provider="openai", image_path: Optional[str] = None) -> Optional[str]:
     """
     Query an LLM with a prompt and optional image attachment.
     
+    Every call is timed and appended to the call log (see summarize_llm_log).
+    
     Args:
         prompt (str): The text prompt to send
         client: The LLM client instance
@@ -139,114 +424,240 @@ def query_llm(prompt: str, client=None, model=None, provider="openai", image_pat
     try:
         # Set default model
         if model is None:
-            if provider == "openai":
-                model = "gpt-4o"
-            elif provider == "azure":
-                model = os.getenv('AZURE_OPENAI_MODEL_DEPLOYMENT', 'gpt-4o-ms')  # Get from env with fallback
-            elif provider == "deepseek":
-                model = "deepseek-chat"
-            elif provider == "siliconflow":
-                model = "deepseek-ai/DeepSeek-R1"
-            elif provider == "anthropic":
-                model = "claude-3-7-sonnet-20250219"
-            elif provider == "gemini":
-                model = "gemini-2.0-flash-exp"
-            elif provider == "local":
-                model = "Qwen/Qwen2.5-32B-Instruct-AWQ"
+            model = default_model(provider)
         
-        if provider in ["openai", "local", "deepseek", "azure", "siliconflow"]:
-            messages = [{"role": "user", "content": []}]
-            
-            # Add text content
-            messages[0]["content"].append({
-                "type": "text",
-                "text": prompt
-            })
-            
-            # Add image content if provided
-            if image_path:
-                if provider == "openai":
-                    encoded_image, mime_type = encode_image_file(image_path)
-                    messages[0]["content"] = [
-                        {"type": "text", "text": prompt},
-                        {"type": "image_url", "image_url": {"url": f"data:{mime_type};base64,{encoded_image}"}}
-                    ]
-            
-            kwargs = {
-                "model": model,
-                "messages": messages,
-                "temperature": 0.7,
-            }
-            
-            # Add o1-specific parameters
-            if model == "o1":
-                kwargs["response_format"] = {"type": "text"}
-                kwargs["reasoning_effort"] = "low"
-                del kwargs["temperature"]
-            
-            response = client.chat.completions.create(**kwargs)
-            return response.choices[0].message.content
-            
-        elif provider == "anthropic":
-            messages = [{"role": "user", "content": []}]
-            
-            # Add text content
-            messages[0]["content"].append({
-                "type": "text",
-                "text": prompt
-            })
-            
-            # Add image content if provided
-            if image_path:
-                encoded_image, mime_type = encode_image_file(image_path)
-                messages[0]["content"].append({
-                    "type": "image",
-                    "source": {
-                        "type": "base64",
-                        "media_type": mime_type,
-                        "data": encoded_image
-                    }
-                })
-            
-            response = client.messages.create(
-                model=model,
-                max_tokens=1000,
-                messages=messages
-            )
-            return response.content[0].text
-            
-        elif provider == "gemini":
-            model = client.GenerativeModel(model)
-            if image_path:
-                file = genai.upload_file(image_path, mime_type="image/png")
-                chat_session = model.start_chat(
-                    history=[{
-                        "role": "user",
-                        "parts": [file, prompt]
-                    }]
-                )
-            else:
-                chat_session = model.start_chat(
-                    history=[{
-                        "role": "user",
-                        "parts": [prompt]
-                    }]
-                )
-            response = chat_session.send_message(prompt)
-            return response.text
+        response, _ = _instrumented_call(prompt, client, model, provider, image_path)
+        return response
             
     except Exception as e:
         print(f"Error querying LLM: {e}", file=sys.stderr)
         return None
 
+def parse_routes(spec: str) -> List[tuple[str, Optional[str]]]:
+    """Parse a route list like 'openai:gpt-4o,anthropic' into [(provider, model), ...]."""
+    routes = []
+    for item in spec.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        provider, _, model = item.partition(':')
+        routes.append((provider, model or None))
+    return routes
+
+def _route_attempt(prompt: str, provider: str, model: Optional[str], image_path: Optional[str],
+                   attempt: int, timeout: float) -> Optional[str]:
+    """One routed attempt: back off if it is a retry, then call the provider."""
+    if attempt > 0:
+        time.sleep(random.uniform(0, min(10.0, 2 ** (attempt - 1))))
+    client = create_llm_client(provider)
+    if hasattr(client, 'with_options'):
+        # Make the SDK give up too, so abandoned threads do not linger
+        client = client.with_options(timeout=timeout)
+    response, _ = _instrumented_call(prompt, client, model or default_model(provider), provider,
+                                     image_path, retries=attempt)
+    return response
+
+def _start_daemon(fn, *args) -> Future:
+    """
+    Run fn(*args) on a daemon thread and return a Future for its result.
+
+    Unlike ThreadPoolExecutor workers, daemon threads are not joined at
+    interpreter exit, so an abandoned attempt (a hedging loser, or a Gemini
+    call with no client timeout) cannot keep the process alive.
+    """
+    future = Future()
+
+    def run() -> None:
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(fn(*args))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, daemon=True).start()
+    return future
+
+def query_llm_routed(prompt: str, routes: List[tuple[str, Optional[str]]], image_path: Optional[str] = None,
+                     max_retries: int = 1, timeout: float = 60.0,
+                     hedge_after: Optional[float] = None) -> Optional[str]:
+    """
+    Query the first healthy provider from an ordered list of routes.
+
+    A failing route is retried with exponential back-off up to max_retries
+    times before failing over to the next route; a route that exceeds
+    timeout seconds is abandoned and the next route tried. If hedge_after is
+    set and the first request has not answered by then, the next route is
+    started in parallel and whichever returns first wins.
+
+    Args:
+        prompt (str): The text prompt to send
+        routes (list): [(provider, model), ...] in order of preference; model may be None
+        image_path (str, optional): Path to an image file to attach
+        max_retries (int): Retries per route on error
+        timeout (float): Seconds before a request is abandoned
+        hedge_after (float, optional): Seconds before a hedged request is sent
+
+    Returns:
+        Optional[str]: The first successful response, or None if all routes failed
+    """
+    if not routes:
+        raise ValueError("No routes given")
+    in_flight = {}
+    next_route = 0
+    hedged = False
+
+    def start(route: int, attempt: int) -> None:
+        provider, model = routes[route]
+        future = _start_daemon(_route_attempt, prompt, provider, model, image_path, attempt, timeout)
+        in_flight[future] = (route, attempt, time.monotonic())
+
+    def start_next_route() -> None:
+        nonlocal next_route
+        if next_route < len(routes):
+            print(f"Routing to {routes[next_route][0]}", file=sys.stderr)
+            start(next_route, 0)
+            next_route += 1
+
+    start_next_route()
+    first_started = time.monotonic()
+    while in_flight:
+        now = time.monotonic()
+        wait_for = min(started + timeout for _, _, started in in_flight.values()) - now
+        can_hedge = hedge_after is not None and not hedged and next_route < len(routes)
+        if can_hedge:
+            wait_for = min(wait_for, first_started + hedge_after - now)
+        done, _ = wait(list(in_flight), timeout=max(0.0, wait_for), return_when=FIRST_COMPLETED)
+
+        for future in done:
+            route, attempt, _ = in_flight.pop(future)
+            provider = routes[route][0]
+            try:
+                response = future.result()
+                print(f"Response from {provider} (attempt {attempt + 1})", file=sys.stderr)
+                return response
+            except Exception as e:
+                print(f"Error querying {provider} (attempt {attempt + 1}): {e}", file=sys.stderr)
+                if attempt < max_retries:
+                    start(route, attempt + 1)
+                elif not in_flight:
+                    start_next_route()
+
+        now = time.monotonic()
+        for future, (route, attempt, started) in list(in_flight.items()):
+            if now - started >= timeout:
+                print(f"Timed out waiting for {routes[route][0]} after {timeout}s", file=sys.stderr)
+                del in_flight[future]
+                future.cancel()
+                if not in_flight:
+                    start_next_route()
+
+        if can_hedge and time.monotonic() - first_started >= hedge_after and in_flight:
+            print(f"No response after {hedge_after}s, sending hedged request", file=sys.stderr)
+            hedged = True
+            start_next_route()
+
+    print("All routes failed", file=sys.stderr)
+    return None
+
+def _percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+def summarize_llm_log(path: Optional[str] = None) -> List[dict]:
+    """
+    Aggregate the call log per provider/model.
+
+    Returns one row per (provider, model) with call and error counts,
+    p50/p95 latency, p50 time to first token and output tokens per second.
+    """
+    path = path or LLM_LOG_PATH
+    groups = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            groups.setdefault((record.get('provider'), record.get('model')), []).append(record)
+
+    rows = []
+    for (provider, model), records in sorted(groups.items(), key=lambda item: str(item[0])):
+        ok = [r for r in records if r.get('ok')]
+        latencies = [r['latency'] for r in ok]
+        ttfts = [r['ttft'] for r in ok if r.get('ttft') is not None]
+        rates = [r['output_tokens'] / (r['latency'] - (r.get('ttft') or 0))
+                 for r in ok if r.get('output_tokens') and r['latency'] > (r.get('ttft') or 0)]
+        rows.append({
+            'provider': provider,
+            'model': model,
+            'calls': len(records),
+            'errors': len(records) - len(ok),
+            'retries': sum(r.get('retries', 0) for r in records),
+            'p50_latency': _percentile(latencies, 50),
+            'p95_latency': _percentile(latencies, 95),
+            'p50_ttft': _percentile(ttfts, 50),
+            'tokens_per_sec': round(sum(rates) / len(rates), 1) if rates else None,
+            'input_tokens': sum(r.get('input_tokens') or 0 for r in ok),
+            'output_tokens': sum(r.get('output_tokens') or 0 for r in ok),
+        })
+    return rows
+
+def print_llm_summary(path: Optional[str] = None) -> None:
+    """Print the call log summary as a table."""
+    def fmt(value):
+        if value is None:
+            return '-'
+        return f"{value:.2f}" if isinstance(value, float) else str(value)
+
+    columns = ['provider', 'model', 'calls', 'errors', 'retries', 'p50_latency', 'p95_latency',
+               'p50_ttft', 'tokens_per_sec', 'input_tokens', 'output_tokens']
+    rows = [[fmt(row[c]) for c in columns] for row in summarize_llm_log(path)]
+    widths = [max(len(c), *(len(r[i]) for r in rows)) for i, c in enumerate(columns)]
+    print("  ".join(c.ljust(w) for c, w in zip(columns, widths)).rstrip())
+    for r in rows:
+        print("  ".join(v.ljust(w) for v, w in zip(r, widths)).rstrip())
+
 def main():
+    global LLM_LOG_PATH
     parser = argparse.ArgumentParser(description='Query an LLM with a prompt')
-    parser.add_argument('--prompt', type=str, help='The prompt to send to the LLM', required=True)
+    parser.add_argument('--prompt', type=str, help='The prompt to send to the LLM')
     parser.add_argument('--provider', choices=['openai','anthropic','gemini','local','deepseek','azure','siliconflow'], default='openai', help='The API provider to use')
     parser.add_argument('--model', type=str, help='The model to use (default depends on provider)')
     parser.add_argument('--image', type=str, help='Path to an image file to attach to the prompt')
+    parser.add_argument('--route', type=str, help='Ordered fallback routes, e.g. "openai:gpt-4o,anthropic,deepseek" (overrides --provider)')
+    parser.add_argument('--max-retries', type=int, default=1, help='Retries per route before failing over (default: 1)')
+    parser.add_argument('--timeout', type=float, default=60.0, help='Seconds before a routed request is abandoned (default: 60)')
+    parser.add_argument('--hedge-after', type=float, help='Send a hedged request to the next route after this many seconds')
+    parser.add_argument('--summary', action='store_true', help='Print latency/token statistics from the call log and exit')
+    parser.add_argument('--log', type=str, help=f'Call log path (default: {LLM_LOG_PATH})')
     args = parser.parse_args()
 
+    if args.log:
+        LLM_LOG_PATH = args.log
+    if args.summary:
+        if not os.path.exists(LLM_LOG_PATH):
+            print(f"No call log found at {LLM_LOG_PATH}", file=sys.stderr)
+            sys.exit(1)
+        print_llm_summary()
+        return
+    if not args.prompt:
+        parser.error('--prompt is required')
+
+    if args.route:
+        response = query_llm_routed(args.prompt, parse_routes(args.route), image_path=args.image,
+                                    max_retries=args.max_retries, timeout=args.timeout,
+                                    hedge_after=args.hedge_after)
+        if response:
+            print(response)
+        else:
+            print("Failed to get response from LLM")
+        return
+
     if not args.model:
         if args.provider == 'openai':
             args.model = "gpt-4o" 
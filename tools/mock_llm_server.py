@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for OpenAI- and Anthropic-compatible chat APIs.
+
+Serves /v1/chat/completions and /v1/messages (streaming and non-streaming)
+with configurable latency, streaming chunk rate and error injection, so
+llm_api can be exercised and benchmarked without keys or network. Point the
+`local` provider at it with LOCAL_LLM_BASE_URL=http://127.0.0.1:PORT/v1, and
+the `anthropic` provider with ANTHROPIC_BASE_URL=http://127.0.0.1:PORT.
+"""
+
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class MockConfig:
+    """Behaviour of the mock server, shared by all request handlers."""
+
+    def __init__(self, latency: float = 0.0, chunk_rate: float = 0.0, chunks: int = 10,
+                 error_rate: float = 0.0, error_status: int = 500):
+        self.latency = latency          # seconds before the first byte
+        self.chunk_rate = chunk_rate    # streamed chunks per second (0 = as fast as possible)
+        self.chunks = chunks            # number of words in each reply
+        self.error_rate = error_rate    # fraction of requests answered with error_status
+        self.error_status = error_status
+
+def _prompt_tokens(messages) -> int:
+    """Rough token count of the text parts of a message list."""
+    count = 0
+    for message in messages:
+        content = message.get('content', '')
+        if isinstance(content, str):
+            count += len(content.split())
+            continue
+        for part in content:
+            if part.get('type') == 'text':
+                count += len(part.get('text', '').split())
+    return count
+
+class MockHandler(BaseHTTPRequestHandler):
+    server_version = 'MockLLM/1.0'
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, status: int, payload: dict) -> None:
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _start_stream(self) -> None:
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+
+    def _event(self, data: dict, event: str = None) -> None:
+        line = f"event: {event}\n" if event else ""
+        self.wfile.write(f"{line}data: {json.dumps(data)}\n\n".encode('utf-8'))
+        self.wfile.flush()
+
+    def _words(self):
+        config = self.server.config
+        for i in range(config.chunks):
+            if config.chunk_rate > 0 and i > 0:
+                time.sleep(1.0 / config.chunk_rate)
+            yield f"word{i} "
+
+    def do_POST(self):
+        config = self.server.config
+        length = int(self.headers.get('Content-Length', 0))
+        try:
+            request = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            self._send_json(400, {'error': {'message': 'invalid JSON'}})
+            return
+
+        if config.latency > 0:
+            time.sleep(config.latency)
+        if config.error_rate > 0 and random.random() < config.error_rate:
+            self._send_json(config.error_status, {'error': {'type': 'mock_error', 'message': 'injected error'}})
+            return
+
+        if self.path.rstrip('/').endswith('/chat/completions'):
+            self._openai(request)
+        elif self.path.rstrip('/').endswith('/messages'):
+            self._anthropic(request)
+        else:
+            self._send_json(404, {'error': {'message': f'unknown path {self.path}'}})
+
+    def _openai(self, request: dict) -> None:
+        model = request.get('model', 'mock')
+        input_tokens = _prompt_tokens(request.get('messages', []))
+        usage = {'prompt_tokens': input_tokens, 'completion_tokens': self.server.config.chunks,
+                 'total_tokens': input_tokens + self.server.config.chunks}
+        base = {'id': 'chatcmpl-mock', 'created': int(time.time()), 'model': model}
+
+        if not request.get('stream'):
+            text = ''.join(self._words())
+            self._send_json(200, dict(base, object='chat.completion', usage=usage, choices=[{
+                'index': 0, 'message': {'role': 'assistant', 'content': text}, 'finish_reason': 'stop'}]))
+            return
+
+        self._start_stream()
+        for word in self._words():
+            self._event(dict(base, object='chat.completion.chunk', choices=[{
+                'index': 0, 'delta': {'role': 'assistant', 'content': word}, 'finish_reason': None}]))
+        self._event(dict(base, object='chat.completion.chunk', choices=[{
+            'index': 0, 'delta': {}, 'finish_reason': 'stop'}]))
+        if (request.get('stream_options') or {}).get('include_usage'):
+            self._event(dict(base, object='chat.completion.chunk', choices=[], usage=usage))
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+    def _anthropic(self, request: dict) -> None:
+        model = request.get('model', 'mock')
+        input_tokens = _prompt_tokens(request.get('messages', []))
+        output_tokens = self.server.config.chunks
+        message = {'id': 'msg_mock', 'type': 'message', 'role': 'assistant', 'model': model,
+                   'stop_reason': None, 'stop_sequence': None}
+
+        if not request.get('stream'):
+            text = ''.join(self._words())
+            self._send_json(200, dict(message, stop_reason='end_turn',
+                                      content=[{'type': 'text', 'text': text}],
+                                      usage={'input_tokens': input_tokens, 'output_tokens': output_tokens}))
+            return
+
+        self._start_stream()
+        self._event({'type': 'message_start', 'message': dict(
+            message, content=[], usage={'input_tokens': input_tokens, 'output_tokens': 0})}, 'message_start')
+        self._event({'type': 'content_block_start', 'index': 0,
+                     'content_block': {'type': 'text', 'text': ''}}, 'content_block_start')
+        for word in self._words():
+            self._event({'type': 'content_block_delta', 'index': 0,
+                         'delta': {'type': 'text_delta', 'text': word}}, 'content_block_delta')
+        self._event({'type': 'content_block_stop', 'index': 0}, 'content_block_stop')
+        self._event({'type': 'message_delta', 'delta': {'stop_reason': 'end_turn', 'stop_sequence': None},
+                     'usage': {'output_tokens': output_tokens}}, 'message_delta')
+        self._event({'type': 'message_stop'}, 'message_stop')
+
+def start_server(config: MockConfig = None, host: str = '127.0.0.1', port: int = 0,
+                 verbose: bool = False) -> ThreadingHTTPServer:
+    """
+    Start the mock server on a background thread and return it.
+
+    Use port=0 to pick a free port (see server.server_address); call
+    server.shutdown() to stop it.
+    """
+    server = ThreadingHTTPServer((host, port), MockHandler)
+    server.daemon_threads = True
+    server.config = config or MockConfig()
+    server.verbose = verbose
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a mock OpenAI/Anthropic-compatible LLM server')
+    parser.add_argument('--host', default='127.0.0.1', help='Address to bind (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8006, help='Port to listen on (default: 8006)')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds before the first byte (default: 0)')
+    parser.add_argument('--chunk-rate', type=float, default=0.0,
+                        help='Streamed chunks per second, 0 for unthrottled (default: 0)')
+    parser.add_argument('--chunks', type=int, default=10, help='Words per reply (default: 10)')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='Fraction of requests that fail (default: 0)')
+    parser.add_argument('--error-status', type=int, default=500,
+                        help='HTTP status of injected errors (default: 500)')
+    parser.add_argument('--verbose', action='store_true', help='Log every request')
+    args = parser.parse_args()
+
+    config = MockConfig(args.latency, args.chunk_rate, args.chunks, args.error_rate, args.error_status)
+    server = start_server(config, args.host, args.port, args.verbose)
+    host, port = server.server_address[:2]
+    print(f"Mock LLM server listening on http://{host}:{port}", file=sys.stderr)
+    print(f"  export LOCAL_LLM_BASE_URL=http://{host}:{port}/v1", file=sys.stderr)
+    print(f"  export ANTHROPIC_BASE_URL=http://{host}:{port} ANTHROPIC_API_KEY=mock", file=sys.stderr)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == '__main__':
+    main()
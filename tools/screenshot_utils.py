@@ -3,8 +3,41 @@
 import asyncio
 from playwright.async_api import async_playwright
 import os
+import io
+import re
+import shutil
+import json
+import time
 import tempfile
 from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+IMAGE_FORMATS = ('png', 'jpeg', 'webp')
+
+def _output_path(url: str, index: int, output_dir: str, image_format: str) -> str:
+    """Build a readable, collision-free file name for a URL in a batch."""
+    slug = re.sub(r'[^A-Za-z0-9]+', '_', re.sub(r'^https?://', '', url)).strip('_')[:80]
+    ext = 'jpg' if image_format == 'jpeg' else image_format
+    return os.path.join(output_dir, f"{index:03d}_{slug or 'page'}.{ext}")
+
+async def _capture(page, url: str, output_path: str, image_format: str = 'png',
+                   quality: Optional[int] = None, clip: Optional[Dict[str, float]] = None,
+                   full_page: bool = True) -> None:
+    """Navigate an open page to url and save a screenshot in the requested format."""
+    await page.goto(url, wait_until='networkidle')
+    options = {'full_page': full_page and clip is None}
+    if clip is not None:
+        options['clip'] = clip
+    if image_format == 'webp':
+        # Playwright only encodes PNG/JPEG, so WebP is re-encoded with Pillow
+        from PIL import Image
+        data = await page.screenshot(type='png', **options)
+        with Image.open(io.BytesIO(data)) as image:
+            image.save(output_path, 'WEBP', quality=quality or 80)
+    else:
+        if image_format == 'jpeg':
+            options['quality'] = quality or 80
+        await page.screenshot(path=output_path, type=image_format, **options)
 
 async def take_screenshot(url: str, output_path: str = None, width: int = 1280, height: int = 720) -> str:
     """
@@ -30,8 +63,7 @@ async def take_screenshot(url: str, output_path: str = None, width: int = 1280,
         page = await browser.new_page(viewport={'width': width, 'height': height})
         
         try:
-            await page.goto(url, wait_until='networkidle')
-            await page.screenshot(path=output_path, full_page=True)
+            await _capture(page, url, output_path)
         finally:
             await browser.close()
     
@@ -43,14 +75,243 @@ def take_screenshot_sync(url: str, output_path: str = None, width: int = 1280, h
     """
     return asyncio.run(take_screenshot(url, output_path, width, height))
 
-if __name__ == "__main__":
+async def take_screenshots(urls: List[str], output_dir: str = None, width: int = 1280, height: int = 720,
+                           max_pages: int = 4, image_format: str = 'png', quality: Optional[int] = None,
+                           clip: Optional[Dict[str, float]] = None, full_page: bool = True) -> List[Dict]:
+    """
+    Take screenshots of several webpages concurrently on one browser.
+
+    Args:
+        urls (List[str]): The URLs to take screenshots of
+        output_dir (str, optional): Directory to save screenshots in. If None, uses a temporary directory.
+        width (int, optional): Viewport width. Defaults to 1280.
+        height (int, optional): Viewport height. Defaults to 720.
+        max_pages (int, optional): Maximum number of pages open at once. Defaults to 4.
+        image_format (str, optional): 'png', 'jpeg' or 'webp'. Defaults to 'png'.
+        quality (int, optional): JPEG/WebP quality (0-100). Defaults to 80.
+        clip (dict, optional): Region to capture ({'x', 'y', 'width', 'height'}); disables full-page capture.
+        full_page (bool, optional): Capture the full scrollable page. Defaults to True.
+
+    Returns:
+        List[Dict]: One result per URL, in input order, with 'url', 'path',
+        'seconds' and 'error' (None on success)
+    """
+    if image_format not in IMAGE_FORMATS:
+        raise ValueError(f"Unsupported image format: {image_format}")
+    if output_dir is None:
+        output_dir = tempfile.mkdtemp(prefix='screenshots_')
+    os.makedirs(output_dir, exist_ok=True)
+
+    semaphore = asyncio.Semaphore(max_pages)
+    results: List[Dict] = []
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        context = await browser.new_context(viewport={'width': width, 'height': height})
+
+        async def capture_one(index: int, url: str) -> Dict:
+            path = _output_path(url, index, output_dir, image_format)
+            async with semaphore:
+                start = time.perf_counter()
+                page = await context.new_page()
+                try:
+                    await _capture(page, url, path, image_format, quality, clip, full_page)
+                    error = None
+                except Exception as e:
+                    path, error = None, str(e)
+                finally:
+                    await page.close()
+                return {'url': url, 'path': path, 'seconds': round(time.perf_counter() - start, 3), 'error': error}
+
+        try:
+            results = await asyncio.gather(*(capture_one(i, url) for i, url in enumerate(urls)))
+        finally:
+            await context.close()
+            await browser.close()
+
+    return list(results)
+
+def take_screenshots_sync(urls: List[str], output_dir: str = None, **kwargs) -> List[Dict]:
+    """
+    Synchronous wrapper for take_screenshots.
+    """
+    return asyncio.run(take_screenshots(urls, output_dir, **kwargs))
+
+DEFAULT_STORE_PATH = os.path.join('.cache', 'screenshot_hashes.json')
+
+def perceptual_hash(image_path: str, hash_size: int = 8) -> int:
+    """
+    Compute a difference hash (dHash) of an image.
+
+    The image is shrunk to (hash_size + 1) x hash_size grayscale pixels and
+    each bit records whether a pixel is brighter than its right neighbour, so
+    small rendering noise leaves the hash unchanged while layout or content
+    changes flip many bits.
+    """
+    from PIL import Image
+    with Image.open(image_path) as image:
+        small = image.convert('L').resize((hash_size + 1, hash_size), Image.LANCZOS)
+        pixels = list(small.getdata())
+    value = 0
+    for row in range(hash_size):
+        for col in range(hash_size):
+            left = pixels[row * (hash_size + 1) + col]
+            right = pixels[row * (hash_size + 1) + col + 1]
+            value = (value << 1) | (left > right)
+    return value
+
+def hash_distance(a: int, b: int) -> int:
+    """Hamming distance between two perceptual hashes."""
+    return bin(a ^ b).count('1')
+
+class CaptureStore:
+    """
+    Remembers the last perceptual hash per URL for visual monitoring.
+
+    A new capture only counts as changed when its hash differs from the
+    stored one by more than threshold bits; unchanged captures can then be
+    discarded instead of being stored or sent to a vision model.
+    """
+
+    def __init__(self, path: str = DEFAULT_STORE_PATH, threshold: int = 5):
+        self.path = path
+        self.threshold = threshold
+        self.data = self._load()
+
+    def _load(self) -> Dict:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def check(self, url: str, image_path: str, saved_path: Optional[str] = None) -> Tuple[bool, Optional[int]]:
+        """
+        Compare a capture against the last stored one for url.
+
+        Returns (changed, distance); distance is None for a URL seen for the
+        first time. The stored hash is only replaced when the capture changed,
+        together with saved_path (default image_path), where the caller keeps it.
+        """
+        new_hash = perceptual_hash(image_path)
+        entry = self.data.get(url)
+        if entry is None:
+            distance = None
+        else:
+            distance = hash_distance(int(entry['hash'], 16), new_hash)
+            if distance <= self.threshold:
+                return False, distance
+        self.data[url] = {'hash': f"{new_hash:016x}", 'path': saved_path or image_path, 'time': int(time.time())}
+        return True, distance
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, indent=2)
+
+async def capture_changed(urls: List[str], store: CaptureStore, output_dir: str = None,
+                          **kwargs) -> List[Dict]:
+    """
+    Screenshot urls and keep only captures that changed since the last run.
+
+    Pages are captured into a scratch directory and only changed captures are
+    moved into output_dir, so the file kept from an earlier run is never
+    overwritten or deleted by an unchanged capture. Unchanged captures are
+    reported with 'changed': False and 'path': None. Extra keyword arguments
+    are passed to take_screenshots.
+    """
+    if output_dir is None:
+        output_dir = tempfile.mkdtemp(prefix='screenshots_')
+    os.makedirs(output_dir, exist_ok=True)
+    # Inside output_dir so the final move is a rename on the same filesystem
+    scratch = tempfile.mkdtemp(prefix='.capture_', dir=output_dir)
+    try:
+        results = await take_screenshots(urls, scratch, **kwargs)
+        for r in results:
+            r['changed'], r['distance'] = False, None
+            if r['error']:
+                continue
+            path = os.path.join(output_dir, os.path.basename(r['path']))
+            r['changed'], r['distance'] = store.check(r['url'], r['path'], path)
+            if r['changed']:
+                os.replace(r['path'], path)
+                r['path'] = path
+            else:
+                r['path'] = None
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+    store.save()
+    return results
+
+def monitor(urls: List[str], prompt: Optional[str] = None, store: CaptureStore = None,
+            output_dir: str = None, provider: str = 'openai', **kwargs) -> List[Dict]:
+    """
+    Visual monitoring pass: capture urls and, if a prompt is given, ask a
+    vision model about each page that changed. Unchanged pages are never
+    sent to the model. Answers are added to the results as 'response'.
+    """
+    if store is None:
+        store = CaptureStore()
+    results = asyncio.run(capture_changed(urls, store, output_dir, **kwargs))
+    if prompt:
+        from llm_api import query_llm
+        for r in results:
+            if r['changed']:
+                r['response'] = query_llm(prompt, provider=provider, image_path=r['path'])
+    return results
+
+def parse_clip(value: str) -> Dict[str, float]:
+    """Parse a clip region given as 'x,y,width,height'."""
+    x, y, w, h = (float(v) for v in value.split(','))
+    return {'x': x, 'y': y, 'width': w, 'height': h}
+
+def main():
     import argparse
-    parser = argparse.ArgumentParser(description='Take a screenshot of a webpage')
-    parser.add_argument('url', help='URL to take screenshot of')
-    parser.add_argument('--output', '-o', help='Output path for screenshot')
+    parser = argparse.ArgumentParser(description='Take screenshots of one or more webpages')
+    parser.add_argument('urls', nargs='*', metavar='url', help='URL(s) to take screenshot of')
+    parser.add_argument('--file', '-f', help='File with one URL per line')
+    parser.add_argument('--output', '-o', help='Output path for screenshot (single URL only)')
+    parser.add_argument('--output-dir', '-d', help='Output directory for batch screenshots')
     parser.add_argument('--width', '-w', type=int, default=1280, help='Viewport width')
     parser.add_argument('--height', '-H', type=int, default=720, help='Viewport height')
+    parser.add_argument('--format', choices=IMAGE_FORMATS, default='png', help='Image format (default: png)')
+    parser.add_argument('--quality', '-q', type=int, help='JPEG/WebP quality 0-100 (default: 80)')
+    parser.add_argument('--clip', type=parse_clip, help='Capture only the region x,y,width,height')
+    parser.add_argument('--viewport-only', action='store_true', help='Capture the viewport instead of the full page')
+    parser.add_argument('--max-pages', type=int, default=4, help='Maximum pages open at once (default: 4)')
+    parser.add_argument('--monitor', action='store_true',
+                        help='Only keep screenshots whose perceptual hash changed since the last run')
+    parser.add_argument('--store', default=DEFAULT_STORE_PATH,
+                        help=f'Hash store for --monitor (default: {DEFAULT_STORE_PATH})')
+    parser.add_argument('--threshold', type=int, default=5,
+                        help='Hash bits that must differ to count as changed (default: 5)')
+    parser.add_argument('--prompt', help='With --monitor, ask a vision model this about each changed page')
+    parser.add_argument('--provider', default='openai', help='LLM provider for --prompt (default: openai)')
     
     args = parser.parse_args()
-    output_path = take_screenshot_sync(args.url, args.output, args.width, args.height)
-    print(f"Screenshot saved to: {output_path}") 
\ No newline at end of file
+    urls = list(args.urls)
+    if args.file:
+        with open(args.file, 'r', encoding='utf-8') as f:
+            urls.extend(line.strip() for line in f if line.strip() and not line.startswith('#'))
+    if not urls:
+        parser.error('no URLs given')
+
+    batch_options = (args.file, args.output_dir, args.clip, args.viewport_only, args.quality, args.monitor)
+    if len(urls) == 1 and args.format == 'png' and not any(batch_options):
+        output_path = take_screenshot_sync(urls[0], args.output, args.width, args.height)
+        print(f"Screenshot saved to: {output_path}")
+        return
+
+    options = dict(width=args.width, height=args.height, max_pages=args.max_pages,
+                   image_format=args.format, quality=args.quality, clip=args.clip,
+                   full_page=not args.viewport_only)
+    if args.monitor:
+        store = CaptureStore(args.store, args.threshold)
+        results = monitor(urls, args.prompt, store, args.output_dir, args.provider, **options)
+    else:
+        results = take_screenshots_sync(urls, args.output_dir, **options)
+    for r in results:
+        print(json.dumps(r, ensure_ascii=False))
+
+if __name__ == "__main__":
+    main()
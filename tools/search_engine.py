@@ -2,10 +2,63 @@
 
 import argparse
 import sys
+import os
 import time
+import json
+import random
+from concurrent.futures import ThreadPoolExecutor
 from duckduckgo_search import DDGS
 
-def search_with_retry(query, max_results=10, max_retries=3):
+from url_utils import normalize_url
+
+DEFAULT_CACHE_PATH = os.path.join('.cache', 'search_engine.json')
+
+class SearchCache:
+    """
+    Local TTL cache of search results keyed by (query, max_results).
+
+    Stored as a single JSON file; expired entries are dropped on save.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=24 * 3600):
+        self.path = path
+        self.ttl = ttl
+        self.data = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def _key(query, max_results):
+        return f"{max_results}\t{query}"
+
+    def get(self, query, max_results):
+        entry = self.data.get(self._key(query, max_results))
+        if entry and time.time() - entry['time'] < self.ttl:
+            return entry['results']
+        return None
+
+    def put(self, query, max_results, results):
+        self.data[self._key(query, max_results)] = {'time': time.time(), 'results': results}
+
+    def save(self):
+        now = time.time()
+        self.data = {k: v for k, v in self.data.items() if now - v['time'] < self.ttl}
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+def backoff_delay(attempt, base=1.0, cap=30.0):
+    """Exponential back-off with full jitter for the given (0-based) attempt."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+def search_with_retry(query, max_results=10, max_retries=3, ddgs=None):
     """
     Search using DuckDuckGo and return results with URLs and text snippets.
     
@@ -13,14 +66,18 @@ def search_with_retry(query, max_results=10, max_retries=3):
         query (str): Search query
         max_results (int): Maximum number of results to return
         max_retries (int): Maximum number of retry attempts
+        ddgs (DDGS, optional): Shared session to use. If None, one is opened per attempt.
     """
     for attempt in range(max_retries):
         try:
             print(f"DEBUG: Searching for query: {query} (attempt {attempt + 1}/{max_retries})", 
                   file=sys.stderr)
             
-            with DDGS() as ddgs:
+            if ddgs is not None:
                 results = list(ddgs.text(query, max_results=max_results))
+            else:
+                with DDGS() as session:
+                    results = list(session.text(query, max_results=max_results))
                 
             if not results:
                 print("DEBUG: No results found", file=sys.stderr)
@@ -32,12 +89,68 @@ def search_with_retry(query, max_results=10, max_retries=3):
         except Exception as e:
             print(f"ERROR: Attempt {attempt + 1}/{max_retries} failed: {str(e)}", file=sys.stderr)
             if attempt < max_retries - 1:  # If not the last attempt
-                print(f"DEBUG: Waiting 1 second before retry...", file=sys.stderr)
-                time.sleep(1)  # Wait 1 second before retry
+                delay = backoff_delay(attempt)
+                print(f"DEBUG: Waiting {delay:.1f} seconds before retry...", file=sys.stderr)
+                time.sleep(delay)
             else:
                 print(f"ERROR: All {max_retries} attempts failed", file=sys.stderr)
                 raise
 
+def search_many(queries, max_results=10, max_retries=3, max_workers=4, cache=None):
+    """
+    Run several queries concurrently over one shared DDGS session.
+
+    Results are returned in query order, each tagged with the query that
+    produced it, with duplicate URLs across queries removed.
+
+    Returns:
+        tuple: (results, failed) where failed lists the queries whose
+        retries were exhausted; they contribute no results.
+
+    Args:
+        queries (list): Search queries
+        max_results (int): Maximum number of results per query
+        max_retries (int): Maximum number of retry attempts per query
+        max_workers (int): Maximum number of queries in flight
+        cache (SearchCache, optional): Cache consulted before searching
+    """
+    per_query = {}
+    failed = []
+    missing = []
+    for query in queries:
+        cached = cache.get(query, max_results) if cache is not None else None
+        if cached is not None:
+            print(f"DEBUG: Cache hit for query: {query}", file=sys.stderr)
+            per_query[query] = cached
+        else:
+            missing.append(query)
+
+    if missing:
+        with DDGS() as ddgs:
+            with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(missing)))) as pool:
+                futures = {q: pool.submit(search_with_retry, q, max_results, max_retries, ddgs)
+                           for q in missing}
+                for query, future in futures.items():
+                    try:
+                        per_query[query] = future.result()
+                    except Exception as e:
+                        print(f"ERROR: Query failed: {query}: {str(e)}", file=sys.stderr)
+                        failed.append(query)
+                        continue
+                    if cache is not None:
+                        cache.put(query, max_results, per_query[query])
+
+    results = []
+    seen = set()
+    for query in queries:
+        for r in per_query.get(query, []):
+            key = normalize_url(r.get('href', '')) or r.get('href', '')
+            if key in seen:
+                continue
+            seen.add(key)
+            results.append(dict(r, query=query))
+    return results, failed
+
 def format_results(results):
     """Format and print search results."""
     for i, r in enumerate(results, 1):
@@ -46,34 +159,44 @@ def format_results(results):
         print(f"Title: {r.get('title', 'N/A')}")
         print(f"Snippet: {r.get('body', 'N/A')}")
 
-def search(query, max_results=10, max_retries=3):
-    """
-    Main search function that handles search with retry mechanism.
-    
-    Args:
-        query (str): Search query
-        max_results (int): Maximum number of results to return
-        max_retries (int): Maximum number of retry attempts
-    """
-    try:
-        results = search_with_retry(query, max_results, max_retries)
-        if results:
-            format_results(results)
-            
-    except Exception as e:
-        print(f"ERROR: Search failed: {str(e)}", file=sys.stderr)
-        sys.exit(1)
-
 def main():
     parser = argparse.ArgumentParser(description="Search using DuckDuckGo API")
-    parser.add_argument("query", help="Search query")
+    parser.add_argument("queries", nargs='+', metavar="query",
+                      help="Search query (several queries run concurrently)")
     parser.add_argument("--max-results", type=int, default=10,
-                      help="Maximum number of results (default: 10)")
+                      help="Maximum number of results per query (default: 10)")
     parser.add_argument("--max-retries", type=int, default=3,
                       help="Maximum number of retry attempts (default: 3)")
+    parser.add_argument("--max-workers", type=int, default=4,
+                      help="Maximum number of queries run at once (default: 4)")
+    parser.add_argument("--json", action="store_true",
+                      help="Print results as a JSON array instead of text")
+    parser.add_argument("--cache-ttl", type=float, default=24 * 3600,
+                      help="Seconds to reuse cached results (default: 86400)")
+    parser.add_argument("--no-cache", action="store_true",
+                      help="Disable the local result cache")
     
     args = parser.parse_args()
-    search(args.query, args.max_results, args.max_retries)
+
+    cache = None if args.no_cache else SearchCache(ttl=args.cache_ttl)
+    try:
+        results, failed = search_many(args.queries, args.max_results, args.max_retries,
+                              args.max_workers, cache)
+    except Exception as e:
+        print(f"ERROR: Search failed: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        if cache is not None:
+            cache.save()
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+    elif results:
+        format_results(results)
+
+    if failed:
+        print(f"ERROR: {len(failed)} of {len(args.queries)} queries failed", file=sys.stderr)
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+
+import asyncio
+import argparse
+import sys
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import List, Optional
+from playwright.async_api import async_playwright
+from duckduckgo_search import DDGS
+
+from search_engine import SearchCache, search_with_retry
+from web_scraper import (PageCache, HostLimiter, DEFAULT_CACHE_DIR, logger,
+                         normalize_url, scrape_page)
+
+async def search_and_scrape(queries: List[str], output, max_results: int = 5, max_retries: int = 3,
+                            max_concurrent: int = 5, per_host: int = 2,
+                            cache: Optional[PageCache] = None,
+                            search_cache: Optional[SearchCache] = None) -> int:
+    """
+    Search for each query and scrape the hits in one pipeline.
+
+    Queries run concurrently in threads over a shared DDGS session while the
+    browser starts up. Each hit is pushed onto the fetch queue as soon as its
+    query returns, deduplicated by normalized URL, and one JSON line
+    (query, url, title, snippet, text) is written per page as it completes.
+    Returns the number of pages written.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    loop = asyncio.get_running_loop()
+    seen = set()
+    written = 0
+
+    async def search_one(query: str, ddgs, executor) -> None:
+        hits = search_cache.get(query, max_results) if search_cache is not None else None
+        if hits is None:
+            try:
+                hits = await loop.run_in_executor(executor, search_with_retry,
+                                                  query, max_results, max_retries, ddgs)
+            except Exception as e:
+                logger.error(f"Search failed for {query}: {str(e)}")
+                return
+            if search_cache is not None:
+                search_cache.put(query, max_results, hits)
+        for hit in hits:
+            url = normalize_url(hit.get('href', ''))
+            if not url or url in seen:
+                continue
+            seen.add(url)
+            await queue.put((query, hit, url))
+
+    async def produce() -> None:
+        try:
+            with DDGS() as ddgs, ThreadPoolExecutor(max_workers=max(1, len(queries))) as executor:
+                await asyncio.gather(*(search_one(q, ddgs, executor) for q in queries))
+        finally:
+            # One stop marker per scraper worker
+            for _ in range(max_concurrent):
+                await queue.put(None)
+
+    async def consume(context, limiter, pool) -> None:
+        nonlocal written
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            query, hit, url = item
+            text = await scrape_page(url, context, limiter, pool, cache)
+            output.write(json.dumps({
+                'query': query,
+                'url': url,
+                'title': hit.get('title'),
+                'snippet': hit.get('body'),
+                'text': text,
+            }, ensure_ascii=False) + '\n')
+            output.flush()
+            written += 1
+
+    # Start searching before the browser is up so the two overlap
+    producer = asyncio.create_task(produce())
+    async with async_playwright() as p:
+        browser = await p.chromium.launch()
+        contexts = []
+        try:
+            contexts = [await browser.new_context() for _ in range(max_concurrent)]
+            limiter = HostLimiter(per_host)
+            with ProcessPoolExecutor() as pool:
+                await asyncio.gather(producer, *(consume(c, limiter, pool) for c in contexts))
+        finally:
+            for context in contexts:
+                await context.close()
+            await browser.close()
+            if cache is not None:
+                cache.evict()
+    return written
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Search DuckDuckGo and scrape the results, streaming extracted text as JSONL.')
+    parser.add_argument('queries', nargs='+', metavar='query', help='Search query')
+    parser.add_argument('--max-results', type=int, default=5,
+                        help='Maximum number of results per query (default: 5)')
+    parser.add_argument('--max-retries', type=int, default=3,
+                        help='Maximum number of search retry attempts (default: 3)')
+    parser.add_argument('--max-concurrent', type=int, default=5,
+                        help='Maximum number of pages open at once (default: 5)')
+    parser.add_argument('--per-host', type=int, default=2,
+                        help='Maximum concurrent pages per host (default: 2)')
+    parser.add_argument('--output', '-o',
+                        help='JSONL output file (default: stdout)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Disable the search and page caches')
+    args = parser.parse_args()
+
+    cache = None if args.no_cache else PageCache(DEFAULT_CACHE_DIR)
+    search_cache = None if args.no_cache else SearchCache()
+    output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+
+    start_time = time.time()
+    try:
+        written = asyncio.run(search_and_scrape(args.queries, output, args.max_results,
+                                                args.max_retries, args.max_concurrent,
+                                                args.per_host, cache, search_cache))
+        logger.info(f"Scraped {written} pages in {time.time() - start_time:.2f}s")
+    except Exception as e:
+        logger.error(f"Error during execution: {str(e)}")
+        sys.exit(1)
+    finally:
+        if search_cache is not None:
+            search_cache.save()
+        if output is not sys.stdout:
+            output.close()
+
+if __name__ == '__main__':
+    main()
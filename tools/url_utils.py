@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""URL helpers shared by the search and scraping tools."""
+
+from typing import Optional
+from urllib.parse import urlparse, urlunparse, urljoin, parse_qsl, urlencode
+
+def normalize_url(url: str, base: Optional[str] = None) -> Optional[str]:
+    """
+    Normalize a URL for deduplication.
+
+    Resolves it against base, lowercases scheme and host, drops default
+    ports, fragments and empty paths, and sorts query parameters. Returns
+    None for anything that is not an http(s) URL.
+    """
+    try:
+        if base:
+            url = urljoin(base, url)
+        parsed = urlparse(url.strip())
+    except ValueError:
+        return None
+    scheme = parsed.scheme.lower()
+    if scheme not in ('http', 'https') or not parsed.hostname:
+        return None
+    netloc = parsed.hostname.lower()
+    try:
+        port = parsed.port
+    except ValueError:
+        return None
+    if port and not ((scheme == 'http' and port == 80) or (scheme == 'https' and port == 443)):
+        netloc = f"{netloc}:{port}"
+    path = parsed.path or '/'
+    query = urlencode(sorted(parse_qsl(parsed.query, keep_blank_values=True)))
+    return urlunparse((scheme, netloc, path, '', query, ''))
@@ -4,14 +4,21 @@ import asyncio
 import argparse
 import sys
 import os
-from typing import List, Optional
+import json
+import hashlib
+import heapq
+import math
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
 from playwright.async_api import async_playwright
 import html5lib
-from multiprocessing import Pool
 import time
 from urllib.parse import urlparse
 import logging
 
+from url_utils import normalize_url
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -20,22 +27,197 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-async def fetch_page(url: str, context) -> Optional[str]:
-    """Asynchronously fetch a webpage's content."""
+DEFAULT_CACHE_DIR = os.path.join('.cache', 'web_scraper')
+
+class PageCache:
+    """
+    Persistent on-disk cache of rendered pages, keyed by URL.
+
+    Each entry is a small JSON file holding the rendered HTML, the extracted
+    text and the ETag/Last-Modified validators returned by the server.
+    Entries younger than ``ttl`` seconds are served without touching the
+    network; older ones are revalidated with a conditional request and only
+    re-rendered when the server reports a change. The directory is kept under
+    ``max_bytes`` by evicting the least recently used entries.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, ttl: float = 3600,
+                 max_bytes: int = 200 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, url: str) -> str:
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, url: str) -> Optional[Dict]:
+        """Return the cached entry for url, or None if there is none."""
+        path = self._path(url)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get('url') != url:
+            return None
+        # Mark as recently used for LRU eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry
+
+    def is_fresh(self, entry: Dict) -> bool:
+        """Check whether an entry can be served without revalidation."""
+        return time.time() - entry.get('fetched_at', 0) < self.ttl
+
+    def put(self, url: str, html: str, text: str,
+            etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+        """Store a rendered page and its extracted text."""
+        entry = {
+            'url': url,
+            'html': html,
+            'text': text,
+            'etag': etag,
+            'last_modified': last_modified,
+            'fetched_at': time.time(),
+        }
+        path = self._path(url)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def touch(self, url: str, entry: Dict) -> None:
+        """Reset the age of an entry after a successful revalidation."""
+        self.put(url, entry['html'], entry['text'], entry.get('etag'), entry.get('last_modified'))
+
+    def evict(self) -> None:
+        """Remove least recently used entries until the cache fits max_bytes."""
+        files = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            files.append((st.st_mtime, st.st_size, path))
+            total += st.st_size
+        if total <= self.max_bytes:
+            return
+        files.sort()
+        for _, size, path in files:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        logger.debug(f"Cache evicted down to {total} bytes")
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter used as the seen-set for large crawls.
+
+    Memory stays constant regardless of how many URLs are added, at the cost
+    of a small false-positive rate (some unseen URLs are treated as seen).
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, int(round(self.size / capacity * math.log(2))))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.sha256(item.encode('utf-8')).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:16], 'little') | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, item: str) -> None:
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+class HostLimiter:
+    """Limit concurrent requests per host and space them out by a minimum delay."""
+
+    def __init__(self, per_host: int = 2, delay: float = 0.0):
+        self.per_host = per_host
+        self.delay = delay
+        self._semaphores: Dict[str, asyncio.Semaphore] = defaultdict(lambda: asyncio.Semaphore(self.per_host))
+        self._locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+        self._last_start: Dict[str, float] = {}
+
+    async def acquire(self, url: str) -> str:
+        host = urlparse(url).netloc.lower()
+        await self._semaphores[host].acquire()
+        if self.delay > 0:
+            async with self._locks[host]:
+                wait = self._last_start.get(host, 0) + self.delay - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                self._last_start[host] = time.monotonic()
+        return host
+
+    def release(self, host: str) -> None:
+        self._semaphores[host].release()
+
+async def render_page(url: str, context) -> Tuple[Optional[str], Dict[str, str]]:
+    """Render a webpage and return its content together with the response headers."""
     page = await context.new_page()
     try:
         logger.info(f"Fetching {url}")
-        await page.goto(url)
+        response = await page.goto(url)
         await page.wait_for_load_state('networkidle')
         content = await page.content()
+        headers = await response.all_headers() if response is not None else {}
         logger.info(f"Successfully fetched {url}")
-        return content
+        return content, headers
     except Exception as e:
         logger.error(f"Error fetching {url}: {str(e)}")
-        return None
+        return None, {}
     finally:
         await page.close()
 
+async def fetch_page(url: str, context) -> Optional[str]:
+    """Asynchronously fetch a webpage's content."""
+    content, _ = await render_page(url, context)
+    return content
+
+async def revalidate(url: str, context, entry: Dict) -> bool:
+    """
+    Issue a conditional GET for a cached entry.
+
+    Returns True if the server answered 304 Not Modified, i.e. the cached
+    copy is still current and the page does not need to be re-rendered.
+    """
+    headers = {}
+    if entry.get('etag'):
+        headers['If-None-Match'] = entry['etag']
+    if entry.get('last_modified'):
+        headers['If-Modified-Since'] = entry['last_modified']
+    if not headers:
+        return False
+    try:
+        response = await context.request.get(url, headers=headers)
+        try:
+            return response.status == 304
+        finally:
+            await response.dispose()
+    except Exception as e:
+        logger.debug(f"Revalidation failed for {url}: {str(e)}")
+        return False
+
 def parse_html(html_content: Optional[str]) -> str:
     """Parse HTML content and extract text with hyperlinks in markdown format."""
     if not html_content:
@@ -123,29 +305,238 @@ def parse_html(html_content: Optional[str]) -> str:
         logger.error(f"Error parsing HTML: {str(e)}")
         return ""
 
-async def process_urls(urls: List[str], max_concurrent: int = 5) -> List[str]:
-    """Process multiple URLs concurrently."""
+def extract_links(html_content: Optional[str], base_url: str) -> List[str]:
+    """Extract normalized absolute http(s) links from HTML content."""
+    if not html_content:
+        return []
+    try:
+        document = html5lib.parse(html_content)
+    except Exception as e:
+        logger.error(f"Error parsing HTML: {str(e)}")
+        return []
+    links = []
+    for elem in document.iter('{http://www.w3.org/1999/xhtml}a'):
+        href = elem.get('href')
+        if not href or href.startswith(('#', 'javascript:', 'mailto:')):
+            continue
+        url = normalize_url(href, base_url)
+        if url:
+            links.append(url)
+    return links
+
+def parse_page(html_content: Optional[str], base_url: str) -> Tuple[str, List[str]]:
+    """Extract text and outgoing links in one call (runs in a worker process)."""
+    return parse_html(html_content), extract_links(html_content, base_url)
+
+async def crawl(seed_urls: List[str], output, max_depth: int = 1, max_pages: int = 100,
+                max_concurrent: int = 5, per_host: int = 2, delay: float = 1.0,
+                same_host: bool = True, cache: Optional[PageCache] = None) -> int:
+    """
+    Crawl outward from seed_urls, streaming one JSON line per page to output.
+
+    The frontier is a priority queue ordered by depth, so pages closer to the
+    seeds are fetched first. URLs are normalized before the seen-set check;
+    crawls larger than 10,000 pages use a Bloom filter instead of a set.
+    Returns the number of pages written.
+    """
+    seen = BloomFilter(max_pages * 10) if max_pages > 10000 else set()
+    frontier: List[Tuple[int, int, str]] = []
+    counter = 0
+    seed_hosts = set()
+    for url in seed_urls:
+        url = normalize_url(url)
+        if url and url not in seen:
+            seen.add(url)
+            seed_hosts.add(urlparse(url).netloc)
+            heapq.heappush(frontier, (0, counter, url))
+            counter += 1
+
+    limiter = HostLimiter(per_host, delay)
+    cond = asyncio.Condition()
+    in_flight = 0
+    scheduled = len(frontier)
+    written = 0
+    loop = asyncio.get_running_loop()
+
+    async def visit(url: str, depth: int, context, pool) -> None:
+        nonlocal written, counter, scheduled
+        entry = cache.get(url) if cache is not None else None
+        headers: Dict[str, str] = {}
+        if entry is not None and cache.is_fresh(entry):
+            logger.info(f"Cache hit for {url}")
+            content = entry['html']
+        else:
+            host = await limiter.acquire(url)
+            try:
+                if entry is not None and await revalidate(url, context, entry):
+                    logger.info(f"Not modified: {url}")
+                    cache.touch(url, entry)
+                    content = entry['html']
+                else:
+                    entry = None
+                    content, headers = await render_page(url, context)
+            finally:
+                limiter.release(host)
+        if not content:
+            return
+        text, links = await loop.run_in_executor(pool, parse_page, content, url)
+        if cache is not None and entry is None:
+            cache.put(url, content, text, headers.get('etag'), headers.get('last-modified'))
+
+        output.write(json.dumps({'url': url, 'depth': depth, 'text': text}, ensure_ascii=False) + '\n')
+        output.flush()
+        written += 1
+
+        if depth >= max_depth:
+            return
+        async with cond:
+            for link in links:
+                if scheduled >= max_pages:
+                    break
+                if same_host and urlparse(link).netloc not in seed_hosts:
+                    continue
+                if link in seen:
+                    continue
+                seen.add(link)
+                heapq.heappush(frontier, (depth + 1, counter, link))
+                counter += 1
+                scheduled += 1
+            cond.notify_all()
+
+    async def worker(context, pool) -> None:
+        nonlocal in_flight
+        while True:
+            async with cond:
+                while not frontier and in_flight > 0:
+                    await cond.wait()
+                if not frontier:
+                    cond.notify_all()
+                    return
+                depth, _, url = heapq.heappop(frontier)
+                in_flight += 1
+            try:
+                await visit(url, depth, context, pool)
+            except Exception as e:
+                logger.error(f"Error crawling {url}: {str(e)}")
+            finally:
+                async with cond:
+                    in_flight -= 1
+                    cond.notify_all()
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch()
+        context = await browser.new_context()
+        try:
+            with ProcessPoolExecutor() as pool:
+                await asyncio.gather(*(worker(context, pool) for _ in range(max_concurrent)))
+        finally:
+            await context.close()
+            await browser.close()
+            if cache is not None:
+                cache.evict()
+    return written
+
+async def scrape_page(url: str, context, limiter: HostLimiter, pool,
+                      cache: Optional[PageCache] = None) -> str:
+    """
+    Fetch one page and return its extracted text, going through the cache.
+
+    Fresh cache entries are returned directly; stale ones are revalidated and
+    only re-rendered if changed. Rendering holds a per-host slot from limiter
+    and parsing runs in the given process pool.
+    """
+    entry = cache.get(url) if cache is not None else None
+    if entry is not None and cache.is_fresh(entry):
+        logger.info(f"Cache hit for {url}")
+        return entry['text']
+    host = await limiter.acquire(url)
+    try:
+        if entry is not None and await revalidate(url, context, entry):
+            logger.info(f"Not modified: {url}")
+            cache.touch(url, entry)
+            return entry['text']
+        content, headers = await render_page(url, context)
+    finally:
+        limiter.release(host)
+    if not content:
+        return ""
+    text = await asyncio.get_running_loop().run_in_executor(pool, parse_html, content)
+    if cache is not None:
+        cache.put(url, content, text, headers.get('etag'), headers.get('last-modified'))
+    return text
+
+async def process_urls(urls: List[str], max_concurrent: int = 5,
+                       cache: Optional[PageCache] = None, per_host: int = 2) -> List[str]:
+    """
+    Process multiple URLs concurrently.
+
+    URLs are kept in one queue per host and handed to at most max_concurrent
+    workers, each with its own browser context, so no more than
+    max_concurrent pages are open at once and no more than per_host of them
+    on the same host. A worker always takes a URL from a host that has a free
+    slot, so a long run of URLs on one host does not leave the other workers
+    idle. Pages are parsed as soon as they are fetched and only the extracted
+    text is kept, so memory stays flat for long URL lists.
+    """
+    results: List[str] = [""] * len(urls)
+    pending: Dict[str, deque] = {}  # host -> indices into urls, in input order
+    active: Dict[str, int] = defaultdict(int)
+
+    # Serve fresh cache entries without launching any requests
+    for i, url in enumerate(urls):
+        entry = cache.get(url) if cache is not None else None
+        if entry is not None and cache.is_fresh(entry):
+            logger.info(f"Cache hit for {url}")
+            results[i] = entry['text']
+        else:
+            pending.setdefault(urlparse(url).netloc.lower(), deque()).append(i)
+    if not pending:
+        return results
+    remaining = sum(len(q) for q in pending.values())
+
+    limiter = HostLimiter(per_host)
+    cond = asyncio.Condition()
+
+    def next_url() -> Optional[Tuple[str, int]]:
+        """Pop the next URL from a host below per_host, rotating hosts for fairness."""
+        for host in list(pending):
+            if active[host] < per_host:
+                queue = pending.pop(host)
+                i = queue.popleft()
+                if queue:
+                    pending[host] = queue  # re-inserted at the end
+                return host, i
+        return None
+
+    async def worker(context, pool) -> None:
+        while True:
+            async with cond:
+                while True:
+                    if not pending:
+                        return
+                    picked = next_url()
+                    if picked is not None:
+                        break
+                    # Every host with pending URLs is at per_host; wait for a slot
+                    await cond.wait()
+                host, i = picked
+                active[host] += 1
+            try:
+                results[i] = await scrape_page(urls[i], context, limiter, pool, cache)
+            finally:
+                async with cond:
+                    active[host] -= 1
+                    cond.notify_all()
+
     async with async_playwright() as p:
         browser = await p.chromium.launch()
+        contexts = []
         try:
-            # Create browser contexts
-            n_contexts = min(len(urls), max_concurrent)
-            contexts = [await browser.new_context() for _ in range(n_contexts)]
-            
-            # Create tasks for each URL
-            tasks = []
-            for i, url in enumerate(urls):
-                context = contexts[i % len(contexts)]
-                task = fetch_page(url, context)
-                tasks.append(task)
-            
-            # Gather results
-            html_contents = await asyncio.gather(*tasks)
-            
-            # Parse HTML contents in parallel
-            with Pool() as pool:
-                results = pool.map(parse_html, html_contents)
-                
+            # One browser context per worker
+            n_workers = min(remaining, max_concurrent)
+            contexts = [await browser.new_context() for _ in range(n_workers)]
+            with ProcessPoolExecutor() as pool:
+                await asyncio.gather(*(worker(context, pool) for context in contexts))
             return results
             
         finally:
@@ -153,6 +544,8 @@ async def process_urls(urls: List[str], max_concurrent: int = 5) -> List[str]:
             for context in contexts:
                 await context.close()
             await browser.close()
+            if cache is not None:
+                cache.evict()
 
 def validate_url(url: str) -> bool:
     """Validate if the given string is a valid URL."""
@@ -166,9 +559,31 @@ def main():
     parser = argparse.ArgumentParser(description='Fetch and extract text content from webpages.')
     parser.add_argument('urls', nargs='+', help='URLs to process')
     parser.add_argument('--max-concurrent', type=int, default=5,
-                       help='Maximum number of concurrent browser instances (default: 5)')
+                       help='Maximum number of pages open at once (default: 5)')
     parser.add_argument('--debug', action='store_true',
                        help='Enable debug logging')
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR,
+                       help=f'Directory for the page cache (default: {DEFAULT_CACHE_DIR})')
+    parser.add_argument('--cache-ttl', type=float, default=3600,
+                       help='Seconds a cached page is served without revalidation (default: 3600)')
+    parser.add_argument('--cache-max-mb', type=float, default=200,
+                       help='Maximum size of the page cache in MB (default: 200)')
+    parser.add_argument('--no-cache', action='store_true',
+                       help='Disable the page cache')
+    parser.add_argument('--crawl', action='store_true',
+                       help='Follow links from the given URLs and stream pages as JSONL')
+    parser.add_argument('--depth', type=int, default=1,
+                       help='Maximum link depth to follow in crawl mode (default: 1)')
+    parser.add_argument('--max-pages', type=int, default=100,
+                       help='Maximum number of pages to crawl (default: 100)')
+    parser.add_argument('--per-host', type=int, default=2,
+                       help='Maximum concurrent pages per host (default: 2)')
+    parser.add_argument('--delay', type=float, default=1.0,
+                       help='Minimum seconds between requests to the same host in crawl mode (default: 1.0)')
+    parser.add_argument('--all-hosts', action='store_true',
+                       help='Follow links to hosts other than the seed URLs in crawl mode')
+    parser.add_argument('--output', '-o',
+                       help='JSONL output file for crawl mode (default: stdout)')
     
     args = parser.parse_args()
     
@@ -187,9 +602,28 @@ def main():
         logger.error("No valid URLs provided")
         sys.exit(1)
     
+    cache = None
+    if not args.no_cache:
+        cache = PageCache(args.cache_dir, args.cache_ttl, int(args.cache_max_mb * 1024 * 1024))
+    
     start_time = time.time()
+    if args.crawl:
+        output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+        try:
+            written = asyncio.run(crawl(valid_urls, output, args.depth, args.max_pages,
+                                        args.max_concurrent, args.per_host, args.delay,
+                                        not args.all_hosts, cache))
+            logger.info(f"Crawled {written} pages in {time.time() - start_time:.2f}s")
+        except Exception as e:
+            logger.error(f"Error during crawl: {str(e)}")
+            sys.exit(1)
+        finally:
+            if output is not sys.stdout:
+                output.close()
+        return
+    
     try:
-        results = asyncio.run(process_urls(valid_urls, args.max_concurrent))
+        results = asyncio.run(process_urls(valid_urls, args.max_concurrent, cache, args.per_host))
         
         # Print results to stdout
         for url, text in zip(valid_urls, results):